@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+import json
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from logging import getLogger
+from typing import Any, Callable, Iterable, Iterator, TextIO
+
+from .core import WordnikDictionaryPlugin
+from .errors import BasePluginException, WordNotFoundException
+
+__all__ = ("BatchLookup",)
+
+LOG = getLogger(__name__)
+
+
+def iter_words(f: TextIO) -> Iterator[str]:
+    for line in f:
+        word = line.strip()
+        if word:
+            yield word
+
+
+def iter_done_words(f: TextIO) -> Iterator[str]:
+    for line in f:
+        try:
+            data = json.loads(line)
+            word = data["word"]
+        except (ValueError, KeyError, TypeError):
+            # a half written line from an interrupted run, that word will be looked up again
+            continue
+        if "errors" not in data:
+            yield word
+
+
+class BatchLookup:
+    """
+    Looks up a list of words with a bounded pool of worker threads, and streams a JSON line for each word as soon as it's done.
+
+    Only `workers * 2` words are in flight at once, so memory stays flat no matter how long the word list is. Requests are sent as background work, so the rate limiter holds them back before they can eat into the quota that interactive queries need.
+    """
+
+    def __init__(
+        self,
+        settings: dict[str, Any],
+        *,
+        workers: int = 4,
+    ) -> None:
+        self.plugin = WordnikDictionaryPlugin()
+        self.plugin.rpc_request = {"settings": settings}
+        self.plugin.http.background = True
+        self.workers = workers
+
+    def lookup(self, word: str) -> dict[str, Any]:
+        plugin = self.plugin
+        result: dict[str, Any] = {"word": word, "found": True}
+        errors: dict[str, str] = {}
+        fields: dict[str, Callable[[], Any]] = {
+            "definitions": lambda: [
+                {
+                    "text": definition.text,
+                    "part_of_speech": definition.part_of_speech,
+                    "attribution": definition.attribution.text,
+                    "wordnik_url": definition.wordnik_url,
+                }
+                for definition in plugin.get_definitions(word)
+            ],
+            "syllables": lambda: plugin.get_syllables(word),
+            "related_words": lambda: {
+                relationship.type: relationship.words
+                for relationship in plugin.get_word_relationships(word)
+            },
+            "scrabble_score": lambda: plugin.get_scrabble_score(word),
+        }
+
+        for name, callback in fields.items():
+            try:
+                result[name] = callback()
+            except WordNotFoundException:
+                result[name] = None
+                if name == "definitions":
+                    result["found"] = False
+                    break
+            except BasePluginException as e:
+                errors[name] = str(e)
+            except Exception as e:
+                LOG.error(
+                    "Error happened while looking up %r for %r", name, word, exc_info=e
+                )
+                errors[name] = repr(e)
+
+        if errors:
+            result["errors"] = errors
+        return result
+
+    def run(
+        self,
+        words: Iterable[str],
+        output: TextIO,
+        *,
+        skip: Iterable[str] = (),
+    ) -> int:
+        skip = set(skip)
+        count = 0
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            pending: set[Future[dict[str, Any]]] = set()
+            for word in words:
+                if word in skip:
+                    continue
+                pending.add(executor.submit(self.lookup, word))
+                if len(pending) >= self.workers * 2:
+                    finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    count += self._write(finished, output)
+            count += self._write(pending, output)
+        return count
+
+    def _write(self, futures: Iterable[Future[dict[str, Any]]], output: TextIO) -> int:
+        count = 0
+        for future in futures:
+            output.write(json.dumps(future.result()) + "\n")
+            count += 1
+        output.flush()
+        return count
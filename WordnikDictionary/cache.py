@@ -0,0 +1,235 @@
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from logging import getLogger
+from typing import Any
+
+from .utils import open_db, transaction
+
+__all__ = ("ResponseCache",)
+
+LOG = getLogger(__name__)
+
+DEFAULT_CACHE_LOC = "WordnikDictionary/cache.sqlite3"
+DEFAULT_MAX_SIZE = 20 * 1024 * 1024
+
+HOUR = 60 * 60
+DAY = 24 * HOUR
+
+# TTLs are keyed by the last segment of the endpoint, ex: `/word.json/{word}/definitions`
+ENDPOINT_TTLS: dict[str, int] = {
+    "definitions": 7 * DAY,
+    "hyphenation": 30 * DAY,
+    "relatedWords": 7 * DAY,
+    "scrabbleScore": 30 * DAY,
+}
+DEFAULT_TTL = DAY
+# 404s are only cached briefly, so that words added to wordnik show up soon after
+NOT_FOUND_TTL = 10 * 60
+# access times only decide the order of evictions, so reads only update them once they're this many seconds old
+ACCESS_RESOLUTION = 60
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    body TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created REAL NOT NULL,
+    expires REAL NOT NULL,
+    accessed REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed);
+CREATE TABLE IF NOT EXISTS stats (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+
+class ResponseCache:
+    """
+    A persistent, size-capped LRU cache for wordnik api responses.
+
+    The cache is stored in a SQLite database in WAL mode, so that the many plugin processes flow launcher spawns can read and write to it at the same time.
+    """
+
+    def __init__(
+        self, loc: str = DEFAULT_CACHE_LOC, *, max_size: int = DEFAULT_MAX_SIZE
+    ) -> None:
+        self.loc = loc
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._conn: sqlite3.Connection | None = None
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = open_db(self.loc, SCHEMA)
+        return self._conn
+
+    @staticmethod
+    def make_key(method: str, endpoint: str, params: dict[str, Any]) -> str:
+        params = {
+            key: value for key, value in sorted(params.items()) if key != "api_key"
+        }
+        return f"{method.upper()} {endpoint} {json.dumps(params, sort_keys=True)}"
+
+    @staticmethod
+    def get_ttl(endpoint: str) -> int:
+        return ENDPOINT_TTLS.get(endpoint.rsplit("/", 1)[-1], DEFAULT_TTL)
+
+    def _bump(self, name: str) -> None:
+        self.conn.execute(
+            "INSERT INTO stats (name, value) VALUES (?, 1) ON CONFLICT(name) DO UPDATE SET value = value + 1",
+            (name,),
+        )
+
+    def _touch(self, key: str, accessed: float, now: float) -> None:
+        if now - accessed >= ACCESS_RESOLUTION:
+            self.conn.execute(
+                "UPDATE responses SET accessed = ? WHERE key = ?", (now, key)
+            )
+
+    def get(self, key: str) -> Any | None:
+        now = time.time()
+        try:
+            with self._lock:
+                row = self.conn.execute(
+                    "SELECT body, accessed FROM responses WHERE key = ? AND expires > ?",
+                    (key, now),
+                ).fetchone()
+                if row is None:
+                    return None
+                self._touch(key, row[1], now)
+        except sqlite3.Error as e:
+            LOG.warning("Unable to read from response cache", exc_info=e)
+            return None
+        return json.loads(row[0])
+
+    def get_response(
+        self,
+        key: str,
+        *,
+        min_ttl: float = 0,
+        stale: bool = False,
+        record_stats: bool = False,
+    ) -> tuple[int, Any] | None:
+        """
+        Like `get`, but also finds 404 responses saved with `set_not_found`. Returns the response's status code and body.
+
+        Responses that expire within `min_ttl` seconds are treated as missing. If `stale` is set, expired responses that haven't been evicted yet are returned too, for when wordnik can't be reached. The hit rate in `stats` only counts lookups made with `record_stats`.
+        """
+
+        now = time.time()
+        not_found_key = f"404 {key}"
+        expires_after = 0 if stale else now + min_ttl
+        try:
+            with self._lock:
+                row = self.conn.execute(
+                    "SELECT key, body, accessed FROM responses WHERE key IN (?, ?) AND expires > ? ORDER BY key = ? DESC LIMIT 1",
+                    (key, not_found_key, expires_after, key),
+                ).fetchone()
+                if row is None:
+                    if record_stats and not stale:
+                        self._bump("misses")
+                    return None
+                self._touch(row[0], row[2], now)
+                if record_stats:
+                    self._bump("stale_hits" if stale else "hits")
+        except sqlite3.Error as e:
+            LOG.warning("Unable to read from response cache", exc_info=e)
+            return None
+        return (404 if row[0] == not_found_key else 200), json.loads(row[1])
+
+    def set_not_found(self, key: str, data: Any, ttl: int = NOT_FOUND_TTL) -> None:
+        self.set(f"404 {key}", data, ttl)
+
+    def set(self, key: str, data: Any, ttl: int) -> None:
+        body = json.dumps(data)
+        size = len(body.encode())
+        if size > self.max_size:
+            return
+
+        now = time.time()
+        try:
+            with self._lock:
+                with transaction(self.conn):
+                    self.conn.execute(
+                        "INSERT OR REPLACE INTO responses (key, body, size, created, expires, accessed) VALUES (?, ?, ?, ?, ?, ?)",
+                        (key, body, size, now, now + ttl, now),
+                    )
+                    self._evict()
+        except sqlite3.Error as e:
+            LOG.warning("Unable to write to response cache", exc_info=e)
+
+    def _evict(self) -> None:
+        (total,) = self.conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()
+        if total <= self.max_size:
+            return
+
+        self.conn.execute("DELETE FROM responses WHERE expires <= ?", (time.time(),))
+        rows = self.conn.execute(
+            "SELECT key, size FROM responses ORDER BY accessed ASC"
+        ).fetchall()
+        (total,) = self.conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()
+        evicted = []
+        for key, size in rows:
+            if total <= self.max_size:
+                break
+            evicted.append((key,))
+            total -= size
+        self.conn.executemany("DELETE FROM responses WHERE key = ?", evicted)
+        LOG.debug("Evicted %d entries from the response cache", len(evicted))
+
+    def consume(self, name: str, limit: int, *, window: int = HOUR) -> bool:
+        """
+        Uses one unit of a budget that's shared between processes, and resets every `window` seconds. Returns `False` if the budget has already been used up.
+        """
+
+        if limit <= 0:
+            return False
+
+        key = f"{name}:{int(time.time() // window)}"
+        try:
+            with self._lock:
+                self.conn.execute(
+                    "DELETE FROM stats WHERE name LIKE ? AND name != ?",
+                    (f"{name}:%", key),
+                )
+                rows = self.conn.execute(
+                    "INSERT INTO stats (name, value) VALUES (?, 1) ON CONFLICT(name) DO UPDATE SET value = value + 1 WHERE value < ? RETURNING value",
+                    (key, limit),
+                ).fetchall()
+        except sqlite3.Error as e:
+            LOG.warning("Unable to update budget in response cache", exc_info=e)
+            return False
+        return bool(rows)
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            data = dict(self.conn.execute("SELECT name, value FROM stats").fetchall())
+            entries, size = self.conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()
+        return {
+            "hits": data.get("hits", 0),
+            "misses": data.get("misses", 0),
+            "stale_hits": data.get("stale_hits", 0),
+            "entries": entries,
+            "size": size,
+            "file_size": os.path.getsize(self.loc) if os.path.exists(self.loc) else 0,
+        }
+
+    def purge(self) -> None:
+        with self._lock:
+            self.conn.execute("DELETE FROM responses")
+            self.conn.execute("DELETE FROM stats")
+            self.conn.execute("VACUUM")
@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import sqlite3
+import threading
+import time
+from logging import getLogger
+
+from .ratelimit import DEFAULT_RATELIMIT_LOC
+from .utils import open_db, transaction
+
+__all__ = ("CircuitBreaker",)
+
+LOG = getLogger(__name__)
+
+# how many failed requests in a row open the circuit
+FAILURE_THRESHOLD = 3
+# how long the circuit stays open, doubling each time a probe fails
+OPEN_BASE = 15
+OPEN_MAX = 5 * 60
+# how long other processes wait on a probe request before sending their own
+PROBE_TIMEOUT = 15
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS circuit (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    failures INTEGER NOT NULL DEFAULT 0,
+    opened_until REAL NOT NULL DEFAULT 0,
+    probing_until REAL NOT NULL DEFAULT 0
+);
+INSERT OR IGNORE INTO circuit (id) VALUES (0);
+"""
+
+
+class CircuitBreaker:
+    """
+    Tracks whether wordnik is up, shared between plugin processes through the rate limit database.
+
+    After `FAILURE_THRESHOLD` timeouts, connection errors or 5xx responses in a row, the circuit opens and requests fail right away instead of each waiting out the timeouts. Once it's been open for a while, a single probe request is let through, which closes the circuit if it succeeds, and opens it again for twice as long if it doesn't.
+    """
+
+    def __init__(self, loc: str = DEFAULT_RATELIMIT_LOC) -> None:
+        self.loc = loc
+        self._lock = threading.Lock()
+        self._conn: sqlite3.Connection | None = None
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = open_db(self.loc, SCHEMA)
+        return self._conn
+
+    def allow(self) -> float:
+        """
+        Returns `0` if a request can be sent, otherwise the number of seconds until wordnik will be tried again.
+        """
+
+        now = time.time()
+        try:
+            with self._lock:
+                with transaction(self.conn):
+                    failures, opened_until, probing_until = self.conn.execute(
+                        "SELECT failures, opened_until, probing_until FROM circuit WHERE id = 0"
+                    ).fetchone()
+                    if failures < FAILURE_THRESHOLD:
+                        delay = 0.0
+                    elif opened_until > now:
+                        delay = opened_until - now
+                    elif probing_until > now:
+                        delay = probing_until - now
+                    else:
+                        # the circuit is half open, so this request is the probe
+                        self.conn.execute(
+                            "UPDATE circuit SET probing_until = ? WHERE id = 0",
+                            (now + PROBE_TIMEOUT,),
+                        )
+                        LOG.info("Probing whether wordnik is back up")
+                        delay = 0.0
+        except sqlite3.Error as e:
+            LOG.warning("Unable to read circuit breaker state", exc_info=e)
+            return 0
+        return delay
+
+    def record_success(self) -> None:
+        try:
+            with self._lock:
+                self.conn.execute(
+                    "UPDATE circuit SET failures = 0, opened_until = 0, probing_until = 0 WHERE id = 0 AND failures != 0"
+                )
+        except sqlite3.Error as e:
+            LOG.warning("Unable to write circuit breaker state", exc_info=e)
+
+    def record_failure(self) -> None:
+        now = time.time()
+        try:
+            with self._lock:
+                (failures,) = self.conn.execute(
+                    "UPDATE circuit SET failures = failures + 1 WHERE id = 0 RETURNING failures"
+                ).fetchall()[0]
+                if failures < FAILURE_THRESHOLD:
+                    return
+                duration = min(
+                    OPEN_BASE * 2 ** (failures - FAILURE_THRESHOLD), OPEN_MAX
+                )
+                self.conn.execute(
+                    "UPDATE circuit SET opened_until = ?, probing_until = 0 WHERE id = 0",
+                    (now + duration,),
+                )
+        except sqlite3.Error as e:
+            LOG.warning("Unable to write circuit breaker state", exc_info=e)
+            return
+        LOG.warning(
+            "Wordnik failed %d requests in a row, pausing requests for %ds",
+            failures,
+            duration,
+        )
+
+    def state(self) -> tuple[int, float]:
+        """
+        Returns the number of failed requests in a row, and how many seconds the circuit stays open for.
+        """
+
+        with self._lock:
+            failures, opened_until = self.conn.execute(
+                "SELECT failures, opened_until FROM circuit WHERE id = 0"
+            ).fetchone()
+        return failures, max(opened_until - time.time(), 0)
@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import time
+from logging import getLogger
+
+from .utils import pid_exists
+
+__all__ = ("RequestCoalescer",)
+
+LOG = getLogger(__name__)
+
+DEFAULT_INFLIGHT_LOC = "WordnikDictionary/inflight"
+# how many polls go by between checks on whether the process holding a lock is still alive
+OWNER_CHECK_INTERVAL = 10
+
+
+class RequestCoalescer:
+    """
+    Lets plugin processes know when another process already has the same request in flight.
+
+    The first process to claim a request key creates a lock file holding its pid, and removes it once the response is in the cache. Any other process that tries to claim the same key waits for the lock file to go away, then reads the response from the cache instead of sending a duplicate request.
+
+    Flow launcher kills the processes of queries that were typed over, so a lock whose process is gone (or that's older than `stale_after` seconds) is treated as stale and removed.
+    """
+
+    def __init__(
+        self,
+        loc: str = DEFAULT_INFLIGHT_LOC,
+        *,
+        stale_after: float = 30,
+        poll_interval: float = 0.01,
+    ) -> None:
+        self.loc = loc
+        self.stale_after = stale_after
+        self.poll_interval = poll_interval
+
+    def get_lock_loc(self, key: str) -> str:
+        digest = hashlib.sha1(key.encode()).hexdigest()
+        return os.path.join(self.loc, f"{digest}.lock")
+
+    def claim(self, key: str) -> bool:
+        """
+        Returns `True` if the key was claimed, in which case `release` must be called once the request is done. Returns `False` if another process has already claimed it.
+        """
+
+        lock_loc = self.get_lock_loc(key)
+        os.makedirs(self.loc, exist_ok=True)
+        for _ in range(2):
+            try:
+                fd = os.open(lock_loc, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except FileExistsError:
+                if not self._remove_if_stale(lock_loc):
+                    return False
+            else:
+                with os.fdopen(fd, "w") as f:
+                    f.write(str(os.getpid()))
+                return True
+        return False
+
+    def _is_stale(self, lock_loc: str) -> bool:
+        if time.time() - os.path.getmtime(lock_loc) >= self.stale_after:
+            return True
+        try:
+            with open(lock_loc, "r") as f:
+                pid = int(f.read())
+        except ValueError:
+            # the owner hasn't written its pid yet
+            return False
+        return not pid_exists(pid)
+
+    def _remove_if_stale(self, lock_loc: str) -> bool:
+        try:
+            if not self._is_stale(lock_loc):
+                return False
+            LOG.debug("Removing stale in-flight lock %r", lock_loc)
+            os.remove(lock_loc)
+        except FileNotFoundError:
+            pass
+        return True
+
+    def release(self, key: str) -> None:
+        try:
+            os.remove(self.get_lock_loc(key))
+        except FileNotFoundError:
+            pass
+
+    def wait(self, key: str, timeout: float) -> bool:
+        """
+        Waits for another process to release the key, or for its lock to go stale. Returns `False` if it's still claimed after `timeout` seconds.
+        """
+
+        lock_loc = self.get_lock_loc(key)
+        deadline = time.monotonic() + timeout
+        polls = 0
+        while os.path.exists(lock_loc):
+            if polls % OWNER_CHECK_INTERVAL == 0 and self._remove_if_stale(lock_loc):
+                return True
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(self.poll_interval)
+            polls += 1
+        return True
@@ -0,0 +1,34 @@
+from __future__ import annotations
+
+from typing import Any
+
+from .utils import Deadline
+
+__all__ = ("RequestContext",)
+
+
+class RequestContext:
+    """
+    The state of one JSON-RPC request: its settings, its deadline, and what happened while handling it.
+
+    Threads that work on a request, like the lookups of an overview, keep the context they were started with, so that if they're still running when the next request comes in, they don't read its settings or mark its results. Once the request is done, `cancelled` is set, and they stop before touching anything else.
+    """
+
+    __slots__ = (
+        "rpc_request",
+        "deadline",
+        "partial_results",
+        "served_stale",
+        "cancelled",
+    )
+
+    def __init__(
+        self, rpc_request: dict[str, Any], deadline: Deadline | None = None
+    ) -> None:
+        self.rpc_request = rpc_request
+        self.deadline = deadline or Deadline()
+        # set by any stage that cut its work short to meet the deadline
+        self.partial_results = False
+        # set when a response had to be served from the cache after it expired, since wordnik couldn't be reached
+        self.served_stale = False
+        self.cancelled = False
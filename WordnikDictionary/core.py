@@ -1,25 +1,55 @@
-import inspect
+import contextlib
+import contextvars
+import functools
+import io
 import json
+import math
 import os
 import re
 import sys
-import webbrowser
-from difflib import SequenceMatcher, get_close_matches
+import threading
+import time
 from logging import getLogger
-from typing import Any
-
-from flowlauncher import FlowLauncherAPI
+from typing import TYPE_CHECKING, Any, Callable, TextIO
 
+from .context import RequestContext
 from .dataclass import Dataclass
 from .definition import Definition
-from .errors import BasePluginException, InternalException
+from .errors import (BasePluginException, InternalException, JSONRPCError,
+                     PluginException, WordNotFoundException)
 from .http import HTTPClient
+from .metrics import Metrics, capture_profile
+from .offline import OfflineDictionary
 from .options import Option
+from .prefetch import Prefetcher
+from .spellcheck import SpellChecker, Suggestion, build_indexes
+from .usage import UsageLog
+from .utils import (Deadline, SerializedList, Truncated,
+                    apply_logging_settings, dump_response, get_payload_limit,
+                    is_locked, spawn_detached)
 from .word_relationship import WordRelationship
+from .wordstore import DEFAULT_INDEX_FOLDER, WordStore
+
+if TYPE_CHECKING:
+    from concurrent.futures import Future
 
 LOG = getLogger(__name__)
-QUERY_REGEX = re.compile(r"^(?P<word>[a-zA-Z]+)(!(?P<filter>[a-zA-Z-_]+))?$")
+QUERY_REGEX = re.compile(r"^(?P<word>[a-zA-Z]+)(!(?P<filter>[a-zA-Z0-9_-]+))?$")
+RELATIONSHIP_REGEX = re.compile(r"^rel-(?P<type>[a-zA-Z_-]+?)(-(?P<page>[0-9]+))?$")
+MULTI_QUERY_REGEX = re.compile(r"^[a-zA-Z]+(\s*,\s*[a-zA-Z]*)+$")
+# best effort recovery of a malformed request's id, so its error can still be matched up with it
+REQUEST_ID_REGEX = re.compile(r'"id"\s*:\s*(-?\d+|"(?:[^"\\]|\\.)*"|null)')
+# the most words that can be looked up at once, so a long list doesn't send a burst of requests
+MAX_MULTI_WORDS = 10
 DEFAULT_WORD_LIST_LOC = "WordnikDictionary/word_list.txt"
+DEFAULT_PAYLOAD_BUDGET = 64
+DEFAULT_QUERY_DEADLINE = 3000
+DEFAULT_RELATIONSHIP_LIMIT = 50
+# how many of the most used lookups are kept warm, how close to expiring their cached responses have to be to get refreshed, and how often that's done automatically
+WARM_COUNT = 25
+WARM_REFRESH_WITHIN = 24 * 60 * 60
+WARM_INTERVAL = 6 * 60 * 60
+SPELLCHECK_MEMO_TTL = 7 * 24 * 60 * 60
 
 parts_of_speech = [
     "noun",
@@ -52,27 +82,258 @@ parts_of_speech = [
 ]
 
 
+@functools.cache
+def get_action_keyword() -> str:
+    with open("plugin.json", "r") as f:
+        return json.load(f)["ActionKeyword"]
+
+
 class WordnikDictionaryPlugin:
-    def __init__(self, args: str | None = None):
+    # the methods flow launcher is allowed to call, either directly or as the callback of an option
+    RPC_METHODS = frozenset(
+        {
+            "query",
+            "context_menu",
+            "open_url",
+            "open_settings_menu",
+            "change_query",
+            "open_log_file_folder",
+            "purge_cache",
+            "download_word_list",
+        }
+    )
+
+    def __init__(self) -> None:
         self.http = HTTPClient(self)
+        self.prefetcher = Prefetcher(self)
+        self.offline = OfflineDictionary()
+        self.metrics = Metrics()
+        self.usage = UsageLog()
+        self.persistent = False
+        self.index_folder = DEFAULT_INDEX_FOLDER
+        self._word_stores: dict[str, WordStore] = {}
+        self._spellcheckers: dict[str, SpellChecker] = {}
 
+        # the request being handled, which threads working on it keep even once the next request comes in
+        self._context: contextvars.ContextVar[RequestContext] = contextvars.ContextVar(
+            "request_context"
+        )
         # defalut jsonrpc
-        self.rpc_request = {"method": "query", "parameters": [""]}
+        self._base_context = RequestContext({"method": "query", "parameters": [""]})
 
-        if args is None and len(sys.argv) > 1:
+    @property
+    def context(self) -> RequestContext:
+        return self._context.get(self._base_context)
+
+    @property
+    def rpc_request(self) -> dict[str, Any]:
+        return self.context.rpc_request
+
+    @rpc_request.setter
+    def rpc_request(self, rpc_request: dict[str, Any]) -> None:
+        # for background work and scripts that drive the plugin directly, instead of through `handle_request`
+        self._base_context = RequestContext(rpc_request)
 
+    @property
+    def deadline(self) -> Deadline:
+        return self.context.deadline
+
+    @property
+    def partial_results(self) -> bool:
+        return self.context.partial_results
+
+    @partial_results.setter
+    def partial_results(self, value: bool) -> None:
+        self.context.partial_results = value
+
+    def run(self, args: str | None = None) -> None:
+        """
+        Handles a single JSON-RPC request, either given or from `sys.argv`, then exits. This is how flow launcher normally runs plugins.
+        """
+
+        start = time.perf_counter()
+        if args is None and len(sys.argv) > 1:
             # Gets JSON-RPC from Flow Launcher process.
-            self.rpc_request = json.loads(sys.argv[1])
-        LOG.debug(f"Received RPC request: {json.dumps(self.rpc_request)}")
+            args = sys.argv[1]
+        with self.metrics.span("rpc_parse"):
+            rpc_request = self.rpc_request if args is None else json.loads(args)
+
+        response = self.handle_request(rpc_request)
+        if response is not None:
+            with self.metrics.span("serialize"):
+                payload = dump_response(response)
+            LOG.debug(
+                "Sending data to flow: %s",
+                Truncated(
+                    payload, get_payload_limit(self.rpc_request.get("settings") or {})
+                ),
+            )
+            print(payload)
+        self.flush_metrics(time.perf_counter() - start)
+
+    def serve(self, stdin: TextIO | None = None, stdout: TextIO | None = None) -> None:
+        """
+        Persistent mode. Reads newline delimited JSON-RPC requests from stdin until EOF, and writes one response line to stdout for each, so that the http connection pool and caches stay warm between queries.
 
+        Callbacks like `change_query` call flow launcher's api by printing a JSON-RPC message, which is captured and sent in the `calls` list of the response instead, so that every request still gets exactly one line.
+
+        A line that isn't valid JSON, isn't a request object, or fails unexpectedly is answered with a JSON-RPC `error` object (and its `id` when one can be recovered) instead, so one bad request can't stall the client or end the server.
+        """
+
+        stdin = stdin or sys.stdin
+        stdout = stdout or sys.stdout
+        self.persistent = True
+        LOG.info("Starting persistent JSON-RPC server")
+        for line in stdin:
+            if not line.strip():
+                continue
+            start = time.perf_counter()
+            handled = False
+            try:
+                payload = self.serve_request(line)
+                handled = True
+            except JSONRPCError as e:
+                LOG.error("Invalid JSON-RPC request received: %r", line, exc_info=e)
+                payload = json.dumps(e.to_response())
+            except Exception as e:
+                LOG.error(
+                    "Error happened while serving JSON-RPC request: %r",
+                    line,
+                    exc_info=e,
+                )
+                payload = json.dumps(
+                    JSONRPCError(
+                        JSONRPCError.INTERNAL_ERROR,
+                        "Internal error",
+                        self.get_request_id(line),
+                    ).to_response()
+                )
+
+            stdout.write(payload + "\n")
+            stdout.flush()
+            if handled:
+                self.flush_metrics(time.perf_counter() - start)
+            else:
+                # don't let the spans of a failed request leak into the next one's metrics
+                self.metrics.clear()
+
+    def serve_request(self, line: str) -> str:
+        try:
+            with self.metrics.span("rpc_parse"):
+                rpc_request = json.loads(line)
+        except ValueError as e:
+            raise JSONRPCError(
+                JSONRPCError.PARSE_ERROR, "Parse error", self.get_request_id(line)
+            ) from e
+        if not self.is_valid_request(rpc_request):
+            raise JSONRPCError(
+                JSONRPCError.INVALID_REQUEST,
+                "Invalid request",
+                rpc_request.get("id") if isinstance(rpc_request, dict) else None,
+            )
+
+        captured = io.StringIO()
+        with contextlib.redirect_stdout(captured):
+            response = self.handle_request(rpc_request)
+        if response is None:
+            response = {"result": None}
+        calls = self.parse_captured_calls(captured.getvalue())
+        if calls:
+            response["calls"] = calls
+        if "id" in rpc_request:
+            response["id"] = rpc_request["id"]
+
+        with self.metrics.span("serialize"):
+            payload = dump_response(response)
+        LOG.debug(
+            "Sending data to flow: %s",
+            Truncated(
+                payload, get_payload_limit(self.rpc_request.get("settings") or {})
+            ),
+        )
+        return payload
+
+    @staticmethod
+    def is_valid_request(rpc_request: Any) -> bool:
+        return (
+            isinstance(rpc_request, dict)
+            and isinstance(rpc_request.get("method", "query"), str)
+            and isinstance(rpc_request.get("parameters", []), list)
+            and isinstance(rpc_request.get("settings") or {}, dict)
+        )
+
+    @staticmethod
+    def get_request_id(line: str) -> Any:
+        match = REQUEST_ID_REGEX.search(line)
+        return json.loads(match.group(1)) if match else None
+
+    @staticmethod
+    def parse_captured_calls(output: str) -> list[dict[str, Any]]:
+        calls = []
+        for line in output.splitlines():
+            if not line.strip():
+                continue
+            try:
+                calls.append(json.loads(line))
+            except ValueError:
+                LOG.warning("Dropping unexpected output from a callback: %r", line)
+        return calls
+
+    def flush_metrics(self, total: float) -> None:
+        settings = self.rpc_request.get("settings") or {}
+        if not settings.get("metrics", True):
+            self.metrics.clear()
+            return
+        self.metrics.record("total", total)
+        self.metrics.flush(method=self.rpc_request.get("method", "query"))
+
+    def handle_request(self, rpc_request: dict[str, Any]) -> dict[str, Any] | None:
+        settings = rpc_request.get("settings") or {}
+        # queries get a deadline from settings, everything else (callbacks) has all the time it needs
+        context = RequestContext(
+            rpc_request,
+            Deadline(
+                self.get_query_deadline(settings)
+                if rpc_request.get("method", "query") == "query"
+                else None
+            ),
+        )
+        self._base_context = context
+        token = self._context.set(context)
+        try:
+            return self._run_request(settings)
+        finally:
+            context.cancelled = True
+            self._context.reset(token)
+
+    def _run_request(self, settings: dict[str, Any]) -> dict[str, Any] | None:
+        apply_logging_settings(settings)
+        # the settings are left out, since they hold the api key
+        LOG.debug(
+            "Received RPC request: method=%r, parameters=%s",
+            self.rpc_request.get("method"),
+            Truncated(self.rpc_request.get("parameters"), get_payload_limit(settings)),
+        )
+
+        profiler = (
+            capture_profile(self.rpc_request.get("method", "query"))
+            if settings.get("profile", False)
+            else contextlib.nullcontext()
+        )
+        with self.metrics.span("handle"), profiler:
+            return self._handle_request()
+
+    def _handle_request(self) -> dict[str, Any] | None:
         # proxy is not working now
         # self.proxy = self.rpc_request.get("proxy", {})
 
         request_method_name = self.rpc_request.get("method", "query")
         request_parameters = self.rpc_request.get("parameters", [])
 
-        methods = inspect.getmembers(self, predicate=inspect.ismethod)
-        request_method = dict(methods)[request_method_name]
+        if request_method_name not in self.RPC_METHODS:
+            LOG.error("Unknown JSON-RPC method requested: %r", request_method_name)
+            return None
+        request_method = getattr(self, request_method_name)
         if request_method_name in ("query", "context_menu"):
             try:
                 raw_results = request_method(*request_parameters)
@@ -80,32 +341,48 @@ class WordnikDictionaryPlugin:
                 raw_results = e.options
             except Exception as e:
                 LOG.error(
-                    f"Error happened while running {request_method_name!r} method.",
+                    "Error happened while running %r method.",
+                    request_method_name,
                     exc_info=e,
                 )
                 raw_results = InternalException().options
-            final_results = []
+            raw_results = list(raw_results)
+            # each result is serialized once, both to measure it against the budget and to send it
+            final_results = SerializedList()
+            budget = self.payload_budget
+            size = 0
 
             for result in raw_results:
                 if isinstance(result, Dataclass):
                     result = result.to_option()
                 if isinstance(result, Option):
+                    if self.http.served_stale:
+                        # wordnik couldn't be reached, so some of the results came from expired cached responses
+                        result.sub = f"(stale) {result.sub}"
                     result = result.to_jsonrpc()
                 if isinstance(result, dict):
-                    final_results.append(result)
+                    piece = json.dumps(result)
+                    size += len(piece)
+                    if budget and size > budget and final_results:
+                        final_results.append_serialized(
+                            self.get_truncated_option(
+                                len(final_results), len(raw_results)
+                            ).to_jsonrpc()
+                        )
+                        break
+                    final_results.append_serialized(result, piece)
                 else:
                     LOG.error(
-                        f"Unknown result given: {result!r}",
+                        "Unknown result given: %r",
+                        result,
                         exc_info=RuntimeError(f"Unknown result given: {result!r}"),
                     )
-                    final_results = InternalException().final_options()
+                    final_results = SerializedList(InternalException().final_options())
                     break
 
-            data = {"result": final_results}
-
-            payload = json.dumps(data)
-            LOG.debug(f"Sending data to flow: {payload}")
-            print(payload)
+            if self.partial_results and request_method_name == "query":
+                final_results.append_serialized(self.get_partial_option().to_jsonrpc())
+            return {"result": final_results}
         else:
             request_method(*request_parameters)
 
@@ -113,13 +390,88 @@ class WordnikDictionaryPlugin:
     def settings(self) -> dict:
         return self.rpc_request["settings"]
 
+    @property
+    def payload_budget(self) -> int:
+        """
+        The max size of the results sent to flow, in bytes. `0` means there is no limit.
+        """
+
+        try:
+            budget = float((self.rpc_request.get("settings") or {})["payload_budget"])
+        except (KeyError, ValueError):
+            budget = DEFAULT_PAYLOAD_BUDGET
+        return max(int(budget * 1024), 0)
+
+    @staticmethod
+    def get_query_deadline(settings: dict[str, Any]) -> float | None:
+        """
+        How long a query has to finish in, in seconds. `None` means there is no deadline.
+        """
+
+        try:
+            deadline = float(settings["query_deadline"])
+        except (KeyError, ValueError):
+            deadline = DEFAULT_QUERY_DEADLINE
+        return deadline / 1000 if deadline > 0 else None
+
+    def get_partial_option(self) -> Option:
+        deadline = self.get_query_deadline(self.settings)
+        return Option(
+            title="Partial results",
+            sub=f"Some lookups were cut short to stay within the {(deadline or 0) * 1000:.0f}ms query deadline, press ENTER to open settings",
+            callback="open_settings_menu",
+            icon="error",
+            score=-100,
+        )
+
+    def get_truncated_option(self, shown: int, total: int) -> Option:
+        return Option(
+            title=f"Showing {shown} of {total} results",
+            sub="The rest didn't fit in the payload size budget, press ENTER to open settings",
+            callback="open_settings_menu",
+            score=-1,
+        )
+
+    def fetch_offline_definitions(self, word: str) -> list[dict[str, Any]] | None:
+        source = self.settings.get("definition_source", "online")
+        if source == "online":
+            return None
+
+        if not self.offline.exists:
+            if source == "offline-first":
+                return None
+            opt = Option(
+                title="No offline dictionary has been imported",
+                sub="Press ENTER for instructions on how to import one",
+                callback="open_url",
+                params=[
+                    "https://github.com/cibere/Flow.Launcher.Plugin.WordNikDictionary?tab=readme-ov-file#offline-dictionary"
+                ],
+                icon="error",
+            )
+            raise PluginException(opt.title, [opt])
+
+        try:
+            limit = int(self.settings["results"])
+        except ValueError:
+            limit = 20
+        with self.metrics.span("offline"):
+            raw = self.offline.lookup(word, limit=limit)
+        if raw or source == "offline":
+            return raw
+        return None
+
     def get_definitions(self, word: str) -> list[Definition]:
-        raw = self.http.fetch_definitions(word)
+        raw = self.fetch_offline_definitions(word)
+        if raw is None:
+            raw = self.http.fetch_definitions(word)
         final = []
-        for data in raw:
-            definition = Definition.from_json(word, data)
-            if definition:
-                final.append(definition)
+        with self.metrics.span("parse_definitions"):
+            for data in raw:
+                definition = Definition.from_json(word, data)
+                if definition:
+                    definition.context_key = ["definition", word, len(final)]
+                    final.append(definition)
         return final
 
     def get_syllables(self, word: str) -> list[str]:
@@ -135,16 +487,567 @@ class WordnikDictionaryPlugin:
         for data in raw:
             item = WordRelationship.from_json(word, data)
             if item:
+                item.context_key = ["relationship", word, item.type]
                 final.append(item)
         return final
 
+    @property
+    def relationship_limit(self) -> int:
+        """
+        How many words of a relationship type are shown at once, ex: for `word!rel-synonym`.
+        """
+
+        try:
+            limit = int(float(self.settings["relationship_limit"]))
+        except (KeyError, ValueError):
+            limit = DEFAULT_RELATIONSHIP_LIMIT
+        return max(limit, 1)
+
+    def get_related_words(
+        self, word: str, rel_type: str, limit: int
+    ) -> list[str] | None:
+        """
+        Returns up to `limit` words of one relationship type, or `None` if the word has none of that type.
+
+        The words are taken from the cached `similiar` listing when it has all of them, otherwise only that relationship type is fetched.
+        """
+
+        listing = self.http.fetch_similiar_words(word, cached_only=True)
+        if listing is not None:
+            words = next(
+                (
+                    data["words"]
+                    for data in listing
+                    if data["relationshipType"] == rel_type
+                ),
+                None,
+            )
+            if words is None:
+                return None
+            try:
+                listing_limit = int(self.settings["results"])
+            except ValueError:
+                listing_limit = 0
+            # a type with fewer words than the listing's limit was sent in full
+            if len(words) >= limit or len(words) < listing_limit:
+                return words[:limit]
+
+        raw = self.http.fetch_similiar_words(word, types=[rel_type], limit=limit) or []
+        for data in raw:
+            if data["relationshipType"] == rel_type:
+                return data["words"]
+        return None
+
+    def get_relationship_options(self, word: str, query: str) -> list[Option] | None:
+        matches = RELATIONSHIP_REGEX.match(query)
+        if not matches:
+            return None
+        rel_type = matches["type"]
+        page = max(int(matches["page"] or 1), 1)
+        limit = page * self.relationship_limit
+
+        # one extra word is fetched, to tell whether there are more to load
+        words = self.get_related_words(word, rel_type, limit + 1)
+        if words is None:
+            return None
+        if not words:
+            return self.handle_wnf(word)
+        has_more = len(words) > limit
+        words = words[:limit]
+
+        options = WordRelationship(word, rel_type, words).get_word_options()
+        if has_more:
+            options.append(
+                Option(
+                    title="Load More",
+                    sub=f"Showing the first {len(words)} words, press ENTER to see more",
+                    callback="change_query",
+                    params=[f"{word}!rel-{rel_type}-{page + 1}"],
+                    score=-1,
+                )
+            )
+        return options
+
     def get_scrabble_score(self, word: str) -> int:
         data = self.http.fetch_scrabble_score(word)
         return data.get("value") or 0
 
+    def run_concurrently(
+        self, callbacks: dict[str, Callable[[], list[Option]]]
+    ) -> "dict[str, Future[list[Option]]]":
+        """
+        Runs each callback in its own thread, and waits for all of them to finish, or for the deadline. Callbacks that are still running by then are left to finish on their own, and their futures aren't done.
+        """
+
+        # make sure the session and cache are created before they're shared between threads
+        self.http.session
+        if self.http.cache_enabled:
+            self.http.cache
+
+        from concurrent.futures import ThreadPoolExecutor, wait
+
+        executor = ThreadPoolExecutor(max_workers=len(callbacks))
+        # each thread gets its own copy of the context, so that it keeps working on this request
+        futures = {
+            name: executor.submit(contextvars.copy_context().run, callback)
+            for name, callback in callbacks.items()
+        }
+        remaining = self.deadline.remaining()
+        wait(futures.values(), timeout=None if remaining == math.inf else remaining)
+        executor.shutdown(wait=False)
+        return futures
+
+    def get_multi_definitions(self, words: list[str]) -> list[Option]:
+        """
+        Looks up the definitions of several words at once, ex: `def affect,effect`. The results are grouped by word, and words that weren't found get their own spellcheck suggestions.
+        """
+
+        futures = self.run_concurrently(
+            {
+                word: lambda word=word: [
+                    definition.to_option() for definition in self.get_definitions(word)
+                ]
+                for word in words
+            }
+        )
+
+        final: list[Option] = []
+        for word, future in futures.items():
+            final.append(
+                Option(
+                    title=word,
+                    sub="Press ENTER to look up just this word",
+                    callback="change_query",
+                    params=[word],
+                    icon="app",
+                )
+            )
+            if not future.done():
+                self.partial_results = True
+                final.append(
+                    Option(
+                        title=f"Ran out of time looking up {word}",
+                        sub="Press ENTER to look up just this word",
+                        callback="change_query",
+                        params=[word],
+                        icon="error",
+                    )
+                )
+                continue
+            try:
+                options = future.result()
+            except WordNotFoundException:
+                options = []
+            except BasePluginException as e:
+                options = e.options
+            except Exception as e:
+                LOG.error("Error happened while looking up %r", word, exc_info=e)
+                options = [
+                    Option(
+                        title=f"Unable to look up {word}",
+                        sub="Check the log file for more details",
+                        icon="error",
+                    )
+                ]
+            else:
+                if options:
+                    self.record_usage(word, "definitions")
+            # spellchecking runs here rather than in the threads, since the index may need to be built first
+            final.extend(options or self.handle_wnf(word))
+
+        # flow sorts results by score, so the scores keep each word's results together and in order
+        for idx, option in enumerate(final):
+            option.score = len(final) - idx
+        return final
+
+    def get_overview(self, word: str) -> list[Option]:
+        def get_syllable_options() -> list[Option]:
+            syllables = self.get_syllables(word)
+            return [Option(title="-".join(syllables))] if syllables else []
+
+        sections: dict[str, Callable[[], list[Option]]] = {
+            "Definitions": lambda: [
+                definition.to_option() for definition in self.get_definitions(word)
+            ],
+            "Syllables": get_syllable_options,
+            "Similiar Words": lambda: [
+                relationship.to_option()
+                for relationship in self.get_word_relationships(word)
+            ],
+            "Scrabble Score": lambda: [
+                Option(title=f"Scrabble Score: {self.get_scrabble_score(word)}")
+            ],
+        }
+
+        futures = self.run_concurrently(sections)
+        # wordnik gives a scrabble score to any string, even one it doesn't know, so only these sections show that the word exists
+        found_sections = {"Definitions", "Syllables", "Similiar Words"}
+        # the usage kind of each section, which is what prefetching refreshes
+        section_kinds = {
+            "Definitions": "definitions",
+            "Syllables": "syllables",
+            "Similiar Words": "similiar",
+            "Scrabble Score": "scrabble",
+        }
+
+        final: list[Option] = []
+        found = False
+        succeeded: list[str] = []
+        for name, future in futures.items():
+            final.append(Option(title=name, icon="app"))
+            if not future.done():
+                self.partial_results = True
+                final.append(
+                    Option(
+                        title=f"Ran out of time getting {name.lower()}", icon="error"
+                    )
+                )
+                # it may still have been found, so don't fall back to spellchecking
+                found = found or name in found_sections
+                continue
+            try:
+                options = future.result()
+            except WordNotFoundException:
+                options = []
+            except BasePluginException as e:
+                options = e.options
+                found = found or name in found_sections
+            except Exception as e:
+                LOG.error(
+                    "Error happened while fetching %r for overview", name, exc_info=e
+                )
+                options = [
+                    Option(
+                        title=f"Unable to get {name.lower()}",
+                        sub="Check the log file for more details",
+                        icon="error",
+                    )
+                ]
+                found = found or name in found_sections
+            else:
+                found = found or (bool(options) and name in found_sections)
+                if options:
+                    succeeded.append(section_kinds[name])
+            final.extend(
+                options or [Option(title=f"No {name.lower()} found", icon="error")]
+            )
+
+        if not found:
+            return self.handle_wnf(word)
+        # only what was actually fetched, so prefetching doesn't keep refreshing lookups that failed or timed out
+        self.record_usage(word, *succeeded)
+
+        # flow sorts results by score, so the scores keep each section together and in order
+        for idx, option in enumerate(final):
+            option.score = len(final) - idx
+        return final
+
+    def get_cache_options(self) -> list[Option]:
+        if not self.http.cache_enabled:
+            return [
+                Option(
+                    title="The response cache is disabled.",
+                    sub="Press ENTER to open settings",
+                    callback="open_settings_menu",
+                    icon="error",
+                )
+            ]
+        stats = self.http.cache.stats()
+        lookups = stats["hits"] + stats["misses"]
+        hit_rate = stats["hits"] / lookups * 100 if lookups else 0
+        return [
+            Option(title="Response Cache", score=100),
+            Option(
+                title=f"Hits: {stats['hits']}, Misses: {stats['misses']}",
+                sub=f"Hit Rate: {hit_rate:.1f}%",
+                score=90,
+            ),
+            Option(
+                title=f"Stale Hits: {stats['stale_hits']}",
+                sub="Expired responses that were served since wordnik couldn't be reached",
+                score=85,
+            ),
+            Option(
+                title=f"Cached Responses: {stats['entries']}",
+                sub=f"Size: {stats['size'] / 1024:.1f} KB of {self.http.cache.max_size / 1024 / 1024:.1f} MB ({stats['file_size'] / 1024:.1f} KB on disk)",
+                score=80,
+            ),
+            Option(
+                title="Purge Cache",
+                sub="Press ENTER to delete all cached responses and reset the stats",
+                callback="purge_cache",
+                score=0,
+            ),
+        ]
+
+    def record_usage(self, word: str, *kinds: str) -> None:
+        if self.context.cancelled:
+            return
+        if self.settings.get("usage_history", True):
+            for kind in kinds:
+                self.usage.record(word, kind)
+
+    def get_warm_jobs(self) -> list[tuple[str, str]]:
+        return [(kind, word) for word, kind, _ in self.usage.top(WARM_COUNT)]
+
+    def warm_when_idle(self) -> None:
+        """
+        Refreshes the cached responses of the most used lookups in the background, at most once every `WARM_INTERVAL` seconds across all processes. Only runs if prefetching is turned on.
+        """
+
+        if not (self.prefetcher.enabled and self.settings.get("usage_history", True)):
+            return
+        if self.http.cache.consume("warm", 1, window=WARM_INTERVAL):
+            self.prefetcher.schedule(self.get_warm_jobs(), refresh=WARM_REFRESH_WITHIN)
+
+    def get_warm_options(self) -> list[Option]:
+        if not self.http.cache_enabled:
+            return [
+                Option(
+                    title="The response cache is disabled.",
+                    sub="Press ENTER to open settings",
+                    callback="open_settings_menu",
+                    icon="error",
+                )
+            ]
+        jobs = self.get_warm_jobs()
+        if not jobs:
+            return [
+                Option(
+                    title="No lookups have been recorded yet.",
+                    sub="Your most used lookups are recorded as you use the plugin, unless turned off in settings",
+                    callback="open_settings_menu",
+                )
+            ]
+
+        self.prefetcher.schedule(jobs, refresh=WARM_REFRESH_WITHIN, force=True)
+        words = list(dict.fromkeys(word for _, word in jobs))
+        return [
+            Option(
+                title=f"Warming the cache for your {len(jobs)} most used lookups",
+                sub=", ".join(words[:10]),
+            )
+        ]
+
+    def get_stats_options(self) -> list[Option]:
+        percentiles = self.metrics.get_percentiles()
+        if percentiles:
+            requests, *_ = percentiles.get("total", (0,))
+            final = [
+                Option(
+                    title="Timing per Phase", sub=f"Over the last {requests} requests"
+                )
+            ]
+            for name, (count, p50, p95, p99) in percentiles.items():
+                final.append(
+                    Option(
+                        title=f"{name}: {p50:.1f}ms",
+                        sub=f"p50: {p50:.1f}ms, p95: {p95:.1f}ms, p99: {p99:.1f}ms ({count} samples)",
+                    )
+                )
+        else:
+            final = [
+                Option(
+                    title="No timing metrics have been recorded yet.",
+                    sub="Metrics are recorded after each query, unless turned off in settings",
+                    callback="open_settings_menu",
+                    icon="error",
+                )
+            ]
+        final.extend(self.get_key_health_options())
+
+        # flow sorts results by score, so the scores keep the phases in order
+        for idx, option in enumerate(final):
+            option.score = len(final) - idx
+        return final
+
+    def get_key_health_options(self) -> list[Option]:
+        final = [
+            Option(
+                title="API Keys", sub="Requests go to the key with the most quota left"
+            )
+        ]
+        for health in self.http.ratelimiter.get_health(self.http.api_keys):
+            if health["disabled"]:
+                state = (
+                    f"Rejected by wordnik, retrying in {health['disabled'] / 60:.0f}m"
+                )
+            elif health["backoff"]:
+                state = f"Rate limited for {health['backoff']:.0f}s"
+            else:
+                state = "OK"
+            quotas = ", ".join(
+                f"{window.title()}: {remaining}/{quota} left"
+                for window, (remaining, quota) in health["quotas"].items()
+            )
+            final.append(
+                Option(
+                    title=f"{health['key']}: {state}",
+                    sub=quotas or "No quota reported by wordnik yet",
+                    icon="error" if health["disabled"] else "app",
+                )
+            )
+
+        failures, opened_for = self.http.circuit.state()
+        if opened_for:
+            final.append(
+                Option(
+                    title=f"Wordnik: Unavailable, retrying in {opened_for:.0f}s",
+                    sub=f"{failures} requests failed in a row, cached responses are served until it's back",
+                    icon="error",
+                )
+            )
+        else:
+            final.append(
+                Option(
+                    title="Wordnik: OK",
+                    sub=f"{failures} requests failed in a row" if failures else "",
+                )
+            )
+        return final
+
+    def get_word_store(self, loc: str) -> WordStore | None:
+        """
+        Returns the compiled word list, or `None` if it's out of date, in which case it's rebuilt in the background.
+        """
+
+        store = self._word_stores.get(loc)
+        if store is not None and store.is_up_to_date():
+            return store
+        store = WordStore(loc, self.index_folder)
+        if not store.is_up_to_date():
+            self.build_indexes_in_background(loc)
+            return None
+        self._word_stores[loc] = store
+        return store
+
+    def get_spellchecker(self, loc: str) -> SpellChecker | None:
+        """
+        Returns the spellcheck index of the word list, or `None` if it's out of date, in which case it's rebuilt in the background.
+        """
+
+        checker = self._spellcheckers.get(loc)
+        if checker is not None and checker.is_up_to_date():
+            return checker
+        store = self.get_word_store(loc)
+        if store is None:
+            return None
+        checker = SpellChecker(store)
+        if not checker.is_up_to_date():
+            self.build_indexes_in_background(loc)
+            return None
+        self._spellcheckers[loc] = checker
+        return checker
+
+    def close_indexes(self, loc: str) -> None:
+        # windows doesn't allow replacing a file while it's memory mapped, so they're closed before they're rebuilt
+        for indexes in (self._spellcheckers, self._word_stores):
+            index = indexes.pop(loc, None)
+            if index is not None:
+                index.close()
+
+    def build_indexes_in_background(self, loc: str) -> None:
+        """
+        Building the indexes of a large word list takes several seconds, which is far too long to keep a query waiting, so it's done in a detached process (or a thread, in persistent mode) that only one process runs at a time.
+        """
+
+        self.close_indexes(loc)
+        if is_locked(WordStore(loc, self.index_folder).build_lock_loc):
+            return
+        LOG.info("Indexing word list %r in the background", loc)
+        if self.persistent:
+            threading.Thread(
+                target=build_indexes, args=(loc, self.index_folder), daemon=True
+            ).start()
+        else:
+            spawn_detached(["--build-index", loc, self.index_folder])
+
+    def get_indexing_options(self) -> list[Option]:
+        return [
+            Option(title="Word Not Found", icon="error", score=110),
+            Option(
+                title="The word list is being indexed for spellchecking",
+                sub="This only happens when the word list changes, and takes a few seconds",
+                icon="error",
+                score=100,
+            ),
+        ]
+
+    def get_suggestions(self, checker: SpellChecker, word: str) -> list[Suggestion]:
+        """
+        Spellchecks `word`, remembering the suggestions in the response cache for as long as the word list stays the same, so that retyping a misspelled word doesn't search the index again.
+        """
+
+        if not self.http.cache_enabled:
+            return self.lookup_suggestions(checker, word)
+
+        size, mtime = checker.words.get_source_stat()
+        key = f"SPELLCHECK {os.path.abspath(checker.words.word_list_loc)} {size}:{mtime} {word}"
+        cached = self.http.cache.get(key)
+        if cached is not None:
+            return [Suggestion(*suggestion) for suggestion in cached]
+
+        suggestions = self.lookup_suggestions(checker, word)
+        # suggestions that were cut short by the deadline aren't remembered, so the next lookup gets a full search
+        if not self.deadline.expired:
+            self.http.cache.set(key, suggestions, SPELLCHECK_MEMO_TTL)
+        return suggestions
+
+    def lookup_suggestions(self, checker: SpellChecker, word: str) -> list[Suggestion]:
+        suggestions = checker.lookup(word, deadline=self.deadline)
+        if self.deadline.expired:
+            self.partial_results = True
+        return suggestions
+
+    @property
+    def word_list_loc(self) -> str:
+        return self.settings.get("wordlist_loc", None) or DEFAULT_WORD_LIST_LOC
+
+    def get_completions(self, word: str) -> list[Option]:
+        if not self.settings.get("prefix_completion", True):
+            return []
+        loc = self.word_list_loc
+        if not os.path.exists(loc):
+            return []
+
+        try:
+            with self.metrics.span("completions"):
+                store = self.get_word_store(loc)
+                if store is None or word in store:
+                    return []
+                completions = store.complete(word)
+        except PermissionError as e:
+            LOG.debug("Permission error encountered", exc_info=e)
+            return []
+        if not completions:
+            return []
+
+        return (
+            [Option(title=f"Words starting with {word!r}", score=110)]
+            + [
+                Option(
+                    title=completion,
+                    sub="Press ENTER to see the definitions",
+                    callback="change_query",
+                    params=[completion],
+                    score=len(completions) - idx + 1,
+                )
+                for idx, completion in enumerate(completions)
+            ]
+            + [
+                Option(
+                    title=f"Look up {word!r} anyway",
+                    sub="Press ENTER to search wordnik for this exact word",
+                    callback="change_query",
+                    params=[f"{word}!define"],
+                    score=0,
+                )
+            ]
+        )
+
     def handle_wnf(self, word: str) -> list[Option]:
         if self.settings["spellcheck_autocomplete"]:
-            loc = self.settings.get("wordlist_loc", None) or DEFAULT_WORD_LIST_LOC
+            loc = self.word_list_loc
             custom = loc != DEFAULT_WORD_LIST_LOC
             exists = os.path.exists(loc)
             if not exists:
@@ -179,12 +1082,20 @@ class WordnikDictionaryPlugin:
                         icon="error",
                     ),
                 ]
+            # there's nothing to spellcheck, and the word list has no empty word to compare it against
+            if not word.strip():
+                return [Option(title="No Results Found")]
             try:
-                with open(loc, "r") as f:
-                    word_list = f.read().split("\n")
+                with self.metrics.span("spellcheck"):
+                    checker = self.get_spellchecker(loc)
+                    if checker is None:
+                        return self.get_indexing_options()
+                    if word in checker.words:
+                        return [Option(title="No Results Found")]
+                    suggestions = self.get_suggestions(checker, word)
             except PermissionError as e:
                 if custom:
-                    LOG.debug(f"Permission error encountered", exc_info=e)
+                    LOG.debug("Permission error encountered", exc_info=e)
                     return [
                         Option(
                             title="Permission Error encountered when trying to open wordlist.",
@@ -194,26 +1105,22 @@ class WordnikDictionaryPlugin:
                     ]
                 else:
                     raise InternalException() from e
-            if word in word_list:
-                return [Option(title="No Results Found")]
-            matches = get_close_matches(word, word_list, n=10)
-            final: list[Option] = []
 
-            for found_word in matches:
-                score = SequenceMatcher(None, word, found_word).ratio() * 100
+            self.prefetcher.schedule(
+                [("definitions", suggestion.word) for suggestion in suggestions[:3]]
+            )
 
+            final: list[Option] = []
+            for idx, suggestion in enumerate(suggestions):
                 final.append(
                     Option(
-                        title=found_word,
-                        sub=score,
+                        title=suggestion.word,
+                        sub=f"Certainty: {suggestion.certainty:.1f}%",
                         callback="change_query",
-                        params=[f"{found_word}"],
+                        params=[f"{suggestion.word}"],
+                        score=len(suggestions) - idx,
                     )
                 )
-            final = sorted(final, key=lambda opt: opt.sub, reverse=True)
-            for idx, res in enumerate(final):
-                res.score = len(final) - idx
-                res.sub = f"Certainty: {res.sub}%"
 
             if final:
                 return [
@@ -233,24 +1140,40 @@ class WordnikDictionaryPlugin:
             return [Option.wnf()]
 
     def query(self, query: str):
-        LOG.info(f"Received query: {query!r}")
+        LOG.info("Received query: %r", query)
 
         if not query.strip():
             LOG.info("No input given, handling wnf.")
+            self.warm_when_idle()
             return self.handle_wnf(query)
 
+        if MULTI_QUERY_REGEX.match(query):
+            words = list(
+                dict.fromkeys(word.strip() for word in query.split(",") if word.strip())
+            )
+            if len(words) > 1:
+                return self.get_multi_definitions(words[:MAX_MULTI_WORDS])
+            # a trailing comma while typing the next word
+            query = words[0]
+
         word = query
         filter_query = None
         matches = QUERY_REGEX.match(query)
         if matches:
             word = matches["word"]
             filter_query = matches.group("filter")
-            LOG.info(f"Match found. {word=}, {filter_query=}")
+            LOG.info("Match found. word=%r, filter_query=%r", word, filter_query)
 
         if filter_query:
             if filter_query == "select-modifier":
                 return [
                     Option(title="Modifier Selection Menu", score=100),
+                    Option(
+                        title="Overview",
+                        sub="Get the definitions, syllables, similiar words and scrabble score of a word at once",
+                        callback="change_query",
+                        params=[f"{word}!overview"],
+                    ),
                     Option(
                         title="Syllables",
                         sub="Get the syllables of a word",
@@ -269,6 +1192,24 @@ class WordnikDictionaryPlugin:
                         callback="change_query",
                         params=[f"{word}!scrabble"],
                     ),
+                    Option(
+                        title="Cache",
+                        sub="See response cache stats, or purge the cache",
+                        callback="change_query",
+                        params=[f"{word}!cache"],
+                    ),
+                    Option(
+                        title="Stats",
+                        sub="See how long each phase of recent lookups took, and the health of your api keys",
+                        callback="change_query",
+                        params=[f"{word}!stats"],
+                    ),
+                    Option(
+                        title="Warm",
+                        sub="Refresh the cached responses of your most used lookups",
+                        callback="change_query",
+                        params=[f"{word}!warm"],
+                    ),
                     Option(
                         title="Filter by Part of Speech",
                         sub="Filter results by the part of speech",
@@ -283,25 +1224,48 @@ class WordnikDictionaryPlugin:
                 ]
             if filter_query == "syllables":
                 syllables = self.get_syllables(word)
-                return [Option(title="-".join(syllables))] or self.handle_wnf(word)
+                if not syllables:
+                    return self.handle_wnf(word)
+                self.record_usage(word, "syllables")
+                return [Option(title="-".join(syllables))]
             elif filter_query == "similiar":
-                return self.get_word_relationships(word) or self.handle_wnf(word)
+                relationships = self.get_word_relationships(word)
+                if relationships:
+                    self.record_usage(word, "similiar")
+                return relationships or self.handle_wnf(word)
             elif filter_query == "scrabble":
                 value = self.get_scrabble_score(word)
+                # wordnik scores words it doesn't know as 0, which isn't worth remembering
+                if value:
+                    self.record_usage(word, "scrabble")
                 return [Option(title=f"Scrabble Score: {value}")]
+            elif filter_query == "overview":
+                return self.get_overview(word)
+            elif filter_query == "cache":
+                return self.get_cache_options()
+            elif filter_query == "stats":
+                return self.get_stats_options()
+            elif filter_query == "warm":
+                return self.get_warm_options()
             elif filter_query.startswith("rel-"):
-                rel_type = filter_query.removeprefix("rel-")
-                relationships = self.get_word_relationships(word)
-                for relationship in relationships:
-                    if relationship.type == rel_type:
-                        return relationship.get_word_options() or self.handle_wnf(word)
+                options = self.get_relationship_options(word, filter_query)
+                if options is not None:
+                    return options
 
-        definitions = self.get_definitions(word)
+        if not filter_query and matches:
+            completions = self.get_completions(word)
+            if completions:
+                return completions
 
-        if filter_query:
+        try:
+            definitions = self.get_definitions(word)
+        except WordNotFoundException:
+            definitions = []
+
+        if filter_query and filter_query != "define":
             if filter_query in parts_of_speech:
                 temp = filter_query.replace("-", " ")
-                definitions = filter(lambda d: d.part_of_speech == temp, definitions)
+                definitions = [d for d in definitions if d.part_of_speech == temp]
             else:
                 return [
                     Option(
@@ -322,33 +1286,94 @@ class WordnikDictionaryPlugin:
                         ],
                     )
                 ]
-        LOG.info(f"No modifiers, returning definitions: {definitions!r}")
+        if definitions:
+            self.record_usage(word, "definitions")
+            self.prefetcher.schedule([("similiar", word)])
+        LOG.debug("No modifiers, returning definitions: %r", definitions)
         return definitions or self.handle_wnf(word)
 
     def context_menu(self, data: list[Any]):
-        LOG.debug(f"Context menu received: {data=}")
+        LOG.debug("Context menu received: data=%r", data)
+        if data and isinstance(data[0], str):
+            return self.get_context_menu_options(data)
         return data
 
+    def get_context_menu_options(self, key: list[Any]) -> list[Option]:
+        """
+        Rebuilds the context menu of a result from its context key. The result set is fetched again, which is served from the response cache or offline dictionary.
+        """
+
+        kind, word, *args = key
+        if kind == "definition":
+            definitions = self.get_definitions(word)
+            if args[0] < len(definitions):
+                return definitions[args[0]]._generate_context_menu_options()
+        elif kind == "relationship":
+            for relationship in self.get_word_relationships(word):
+                if relationship.type == args[0]:
+                    return relationship._generate_context_menu_options()
+        elif kind == "related_word":
+            return WordRelationship.get_word_context_menu_options(word)
+
+        return [
+            Option(
+                title="The details of this result are no longer available",
+                sub="Search for the word again to see them",
+                icon="error",
+            )
+        ]
+
     def open_url(self, url):
+        import webbrowser
+
         webbrowser.open(url)
 
     def open_settings_menu(self):
+        from flowlauncher import FlowLauncherAPI
+
         FlowLauncherAPI.open_setting_dialog()
 
     def change_query(self, query: str):
-        with open("plugin.json", "r") as f:
-            data = json.load(f)
-        FlowLauncherAPI.change_query(f"{data['ActionKeyword']} {query}")
+        from flowlauncher import FlowLauncherAPI
+
+        FlowLauncherAPI.change_query(f"{get_action_keyword()} {query}")
 
     def open_log_file_folder(self):
         os.system(f'explorer.exe /select, "wordnik.logs"')
 
+    def purge_cache(self):
+        from flowlauncher import FlowLauncherAPI
+
+        self.http.cache.purge()
+        FlowLauncherAPI.show_msg(
+            title="Response Cache Purged",
+            sub_title="",
+            ico_path="Images/app.png",
+        )
+
     def download_word_list(self):
-        data: bytes = self.http.fetch_word_list_file()
-        with open(DEFAULT_WORD_LIST_LOC, "wb") as f:
-            f.write(data)
+        from flowlauncher import FlowLauncherAPI
+
+        try:
+            changed = self.http.download_word_list_file(DEFAULT_WORD_LIST_LOC)
+        except BasePluginException as e:
+            LOG.error("Unable to download the word list", exc_info=e)
+            FlowLauncherAPI.show_msg(
+                title="Unable to Download Word List",
+                sub_title=str(e),
+                ico_path="Images/error.png",
+            )
+            return
+
+        # build the indexes now, rather than on the next query that needs them
+        self.close_indexes(DEFAULT_WORD_LIST_LOC)
+        build_indexes(DEFAULT_WORD_LIST_LOC, self.index_folder)
         FlowLauncherAPI.show_msg(
-            title="Word List Successfully Downloaded",
+            title=(
+                "Word List Successfully Downloaded"
+                if changed
+                else "Word List Already Up to Date"
+            ),
             sub_title="",
             ico_path="Images/app.png",
         )
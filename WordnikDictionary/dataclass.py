@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import Self
+from typing import Any, Self
 
 from .options import Option
 
@@ -8,6 +8,9 @@ __all__ = ("Dataclass",)
 
 
 class Dataclass:
+    # a compact key that `WordnikDictionaryPlugin.context_menu` can rebuild the context menu from
+    context_key: list[Any] | None = None
+
     @classmethod
     def from_json(cls: type[Self], word: str, data: dict) -> Self | None:
         raise RuntimeError("This must be overriden")
@@ -20,5 +23,8 @@ class Dataclass:
 
     def to_option(self) -> Option:
         opt = self._generate_base_option()
-        opt.context_data = self._generate_context_menu_options()
+        if self.context_key is None:
+            opt.context_data = self._generate_context_menu_options()
+        else:
+            opt.context_key = self.context_key
         return opt
@@ -2,7 +2,6 @@ from __future__ import annotations
 
 from .attributions import Attribution
 from .dataclass import Dataclass
-from .html_stripper import strip_tags
 from .options import Option
 
 __all__ = ("Definition",)
@@ -17,6 +16,8 @@ class Definition(Dataclass):
         wordnik_url: str,
         word: str,
     ) -> None:
+        from .html_stripper import strip_tags
+
         self.word: str = word
         self.attribution: Attribution = attribution
         self.text: str = strip_tags(text)
@@ -1,8 +1,20 @@
 from __future__ import annotations
 
+from typing import Any
+
 from .options import Option
 
-__all__ = ("PluginException", "InternalException", "BasePluginException")
+__all__ = (
+    "PluginException",
+    "InternalException",
+    "BasePluginException",
+    "WordNotFoundException",
+    "BudgetExhaustedException",
+    "RateLimitedException",
+    "UnavailableException",
+    "DeadlineExceededException",
+    "JSONRPCError",
+)
 
 
 class BasePluginException(Exception):
@@ -34,6 +46,30 @@ class PluginException(BasePluginException):
         return cls(opt.title, [opt])
 
 
+class WordNotFoundException(PluginException):
+    pass
+
+
+class BudgetExhaustedException(PluginException):
+    pass
+
+
+class RateLimitedException(PluginException):
+    pass
+
+
+class UnavailableException(PluginException):
+    """
+    Raised when wordnik can't be reached, ex: a timeout, connection error or 5xx response, so that a stale cached response can be served instead.
+    """
+
+
+class DeadlineExceededException(UnavailableException):
+    """
+    Raised when there's no time left in the query's deadline to send a request.
+    """
+
+
 class InternalException(BasePluginException):
     def __init__(self) -> None:
         opts = [
@@ -68,3 +104,27 @@ class InternalException(BasePluginException):
 
     def final_options(self) -> list[dict]:
         return [opt.to_jsonrpc() for opt in self.options]
+
+
+class JSONRPCError(Exception):
+    """
+    Raised when a request in persistent mode can't be handled, so that it's answered with a JSON-RPC error object instead of results.
+    """
+
+    # https://www.jsonrpc.org/specification#error_object
+    PARSE_ERROR = -32700
+    INVALID_REQUEST = -32600
+    INTERNAL_ERROR = -32603
+
+    def __init__(self, code: int, message: str, request_id: Any = None) -> None:
+        super().__init__(message)
+        self.code = code
+        self.message = message
+        self.request_id = request_id
+
+    def to_response(self) -> dict[str, Any]:
+        return {
+            "result": None,
+            "error": {"code": self.code, "message": self.message},
+            "id": self.request_id,
+        }
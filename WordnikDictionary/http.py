@@ -1,30 +1,90 @@
 from __future__ import annotations
 
+import contextlib
+import json
+import math
+import os
+import queue
+import random
+import threading
+import time
 from logging import getLogger
 from typing import TYPE_CHECKING, Any
 from urllib.parse import quote_plus
 
-import requests
-
-from .errors import PluginException
+from .cache import DEFAULT_MAX_SIZE, ResponseCache
+from .circuit import CircuitBreaker
+from .coalesce import RequestCoalescer
+from .errors import (
+    BudgetExhaustedException,
+    DeadlineExceededException,
+    PluginException,
+    RateLimitedException,
+    UnavailableException,
+    WordNotFoundException,
+)
 from .options import Option
+from .ratelimit import RateLimiter
+from .utils import Truncated, get_payload_limit
 
 LOG = getLogger(__name__)
 if TYPE_CHECKING:
+    import requests
+
     from .core import WordnikDictionaryPlugin
 
 ICO_PATH = "Images/app.png"
+API_URL = os.environ.get("WORDNIK_API_URL", "https://api.wordnik.com/v4")
+DEFAULT_CONNECT_TIMEOUT = 3.05
+DEFAULT_READ_TIMEOUT = 10
+WORD_LIST_CHUNK_SIZE = 64 * 1024
+WORD_LIST_URL = "https://raw.githubusercontent.com/dwyl/english-words/refs/heads/master/words_alpha.txt"
+
+# how long a request can be held back by the rate limiter before giving up, and how many 429s in a row it can get
+INTERACTIVE_MAX_WAIT = 2
+BACKGROUND_MAX_WAIT = 5 * 60
+INTERACTIVE_MAX_ATTEMPTS = 2
+BACKGROUND_MAX_ATTEMPTS = 6
+# how many times a GET request is retried after a timeout, connection error or 5xx response, with a jittered exponential backoff
+INTERACTIVE_MAX_RETRIES = 1
+BACKGROUND_MAX_RETRIES = 3
+RETRY_BACKOFF_BASE = 0.25
+RETRY_BACKOFF_MAX = 4
+# how long an interactive request waits on the same request from another process, as a share of the time left in the deadline and in seconds, before sending its own
+COALESCE_WAIT_SHARE = 0.25
+COALESCE_MAX_WAIT = 0.5
+# requests aren't sent with less than this many seconds left in the query's deadline, since they couldn't make it back in time
+DEADLINE_MARGIN = 0.1
 
 
 class HTTPClient:
 
     def __init__(self, flow: WordnikDictionaryPlugin):
         self.flow = flow
+        self._cache: ResponseCache | None = None
+        self._session: requests.Session | None = None
+        self.coalescer = RequestCoalescer()
+        self.ratelimiter = RateLimiter()
+        self.circuit = CircuitBreaker()
+
+        # background work, like prefetching and batch lookups, only gets the part of the quota interactive queries don't need, and can optionally be limited to an hourly budget
+        self.background = False
+        self.background_budget: int | None = None
+        # cached responses that expire within this many seconds are fetched again, used to keep the cache warm
+        self.refresh_within: float = 0
 
     @property
     def settings(self) -> dict:
         return self.flow.rpc_request["settings"]
 
+    @property
+    def served_stale(self) -> bool:
+        return self.flow.context.served_stale
+
+    @served_stale.setter
+    def served_stale(self, value: bool) -> None:
+        self.flow.context.served_stale = value
+
     @property
     def debug(self) -> bool:
         try:
@@ -32,6 +92,91 @@ class HTTPClient:
         except TypeError:
             return True
 
+    @property
+    def cache_enabled(self) -> bool:
+        return self.settings.get("cache_enabled", True)
+
+    @property
+    def cache(self) -> ResponseCache:
+        if self._cache is None:
+            try:
+                max_size = int(float(self.settings["cache_size"]) * 1024 * 1024)
+            except (KeyError, ValueError):
+                max_size = DEFAULT_MAX_SIZE
+            self._cache = ResponseCache(max_size=max_size)
+        return self._cache
+
+    @property
+    def session(self) -> requests.Session:
+        if self._session is None:
+            # requests takes longer to import than the rest of the plugin combined, and cached lookups never need it
+            import requests
+            from requests.adapters import HTTPAdapter
+
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=10)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            session.headers.update(
+                {
+                    "Accept-Encoding": "gzip, deflate",
+                    "Connection": "keep-alive",
+                }
+            )
+            self._session = session
+        return self._session
+
+    def _get_timeout_setting(self, name: str, default: float) -> float:
+        try:
+            value = float(self.settings[name])
+        except (KeyError, ValueError):
+            return default
+        return value if value > 0 else default
+
+    @property
+    def api_keys(self) -> list[str]:
+        """
+        The api key setting can hold several keys separated by commas, which requests are spread across.
+        """
+
+        keys = (key.strip() for key in self.settings["api_key"].split(","))
+        return list(dict.fromkeys(key for key in keys if key)) or [""]
+
+    @property
+    def hedge_after(self) -> float | None:
+        """
+        How long an interactive request can go without a response before an identical one is sent alongside it, in seconds. Whichever responds first is used. `None` if hedging is turned off.
+        """
+
+        try:
+            value = float(self.settings["hedge_after"]) / 1000
+        except (KeyError, ValueError):
+            return None
+        return value if value > 0 else None
+
+    @property
+    def timeout(self) -> tuple[float, float]:
+        return (
+            self._get_timeout_setting("connect_timeout", DEFAULT_CONNECT_TIMEOUT),
+            self._get_timeout_setting("read_timeout", DEFAULT_READ_TIMEOUT),
+        )
+
+    def get_coalesce_wait(self) -> float:
+        if self.background:
+            return sum(self.timeout)
+        return min(
+            self.flow.deadline.remaining() * COALESCE_WAIT_SHARE, COALESCE_MAX_WAIT
+        )
+
+    def get_timeout(self) -> tuple[float, float]:
+        """
+        The timeouts, cut down to the time left in the query's deadline.
+        """
+
+        remaining = self.flow.deadline.remaining()
+        connect, read = self.timeout
+        return min(connect, remaining), min(read, remaining)
+
     def request(
         self,
         method: str,
@@ -40,41 +185,382 @@ class HTTPClient:
         params: dict[str, Any] | None = None,
         headers: dict[str, str] | None = None,
         raise_wnf_on_404: bool = True,
+        cached_only: bool = False,
         **kwargs,
     ) -> Any:
+        """
+        Sends a request to the wordnik api, or serves it from the response cache. If `cached_only` is set, `None` is returned instead of sending the request when it isn't cached.
+
+        If wordnik can't be reached, an expired response from the cache is served instead, and `served_stale` is set.
+        """
+
         if params is None:
             params = {}
         if headers is None:
             headers = {}
 
+        cache_key = None
+        if method.upper() == "GET" and self.cache_enabled:
+            cache_key = ResponseCache.make_key(method, endpoint, params)
+            with self.flow.metrics.span("cache"):
+                # probes for whether something is cached, and prefetching, aren't lookups, so they don't count towards the hit rate
+                cached = self.cache.get_response(
+                    cache_key,
+                    min_ttl=self.refresh_within,
+                    record_stats=not (cached_only or self.background),
+                )
+            if cached is not None:
+                LOG.debug("Serving HTTP response from cache. cache_key=%r", cache_key)
+                return self._check_not_found(*cached, raise_wnf_on_404)
+        if cached_only:
+            return None
+
+        if cache_key is None:
+            status, data = self._send(
+                method, endpoint, params=params, headers=headers, **kwargs
+            )
+            return self._check_not_found(status, data, raise_wnf_on_404)
+
+        stale_key = cache_key
+        if not self.coalescer.claim(cache_key):
+            # another process is already sending this exact request, so wait for it's response to land in the cache
+            LOG.debug("Waiting for in-flight request. cache_key=%r", cache_key)
+            if self.coalescer.wait(cache_key, self.get_coalesce_wait()):
+                cached = self.cache.get_response(cache_key)
+                if cached is not None:
+                    LOG.debug(
+                        "Serving coalesced HTTP response. cache_key=%r", cache_key
+                    )
+                    return self._check_not_found(*cached, raise_wnf_on_404)
+            if not self.coalescer.claim(cache_key):
+                cache_key = None
+
+        try:
+            status, data = self._send(
+                method, endpoint, params=params, headers=headers, **kwargs
+            )
+            if cache_key is not None:
+                with self.flow.metrics.span("cache"):
+                    if status == 200:
+                        self.cache.set(cache_key, data, ResponseCache.get_ttl(endpoint))
+                    elif status == 404:
+                        # remember misses too, so that retyping a misspelled word doesn't hit the api every keystroke
+                        self.cache.set_not_found(cache_key, data)
+            return self._check_not_found(status, data, raise_wnf_on_404)
+        except UnavailableException:
+            with self.flow.metrics.span("cache"):
+                stale = self.cache.get_response(
+                    stale_key, stale=True, record_stats=True
+                )
+            if stale is None:
+                raise
+            LOG.info(
+                "Wordnik is unavailable, serving stale response. cache_key=%r",
+                stale_key,
+            )
+            self.served_stale = True
+            return self._check_not_found(*stale, raise_wnf_on_404)
+        finally:
+            if cache_key is not None:
+                self.coalescer.release(cache_key)
+
+    @staticmethod
+    def _check_not_found(status: int, data: Any, raise_wnf_on_404: bool) -> Any:
+        if status == 404 and raise_wnf_on_404:
+            raise WordNotFoundException.wnf()
+        return data
+
+    def _send(
+        self,
+        method: str,
+        endpoint: str,
+        *,
+        params: dict[str, Any],
+        headers: dict[str, str],
+        **kwargs,
+    ) -> tuple[int, Any]:
+        if (
+            self.background
+            and self.background_budget is not None
+            and not self.cache.consume("background_budget", self.background_budget)
+        ):
+            raise BudgetExhaustedException.create(
+                "The background request budget has been used up"
+            )
+
         headers["Accept"] = "application/json"
-        params["api_key"] = self.settings["api_key"]
-        url = f"https://api.wordnik.com/v4{endpoint}"
-        LOG.debug(f"Sending HTTP request. {url=}, {params=}, {headers=}, {kwargs=}")
-        res = requests.request(method, url, params=params, headers=headers, **kwargs)
-        data = res.json()
+        keys = self.api_keys
+        url = f"{API_URL}{endpoint}"
         LOG.debug(
-            f"Received HTTP response. {res.status_code=}, {res.headers=}, {data=}"
+            "Sending HTTP request. url=%r, params=%r, headers=%r, kwargs=%r",
+            url,
+            params,
+            headers,
+            kwargs,
         )
-        if res.status_code == 401:
-            opt = Option(
-                title="Invalid API Key",
-                sub="Click ENTER for instructions on how to get a valid API key",
-                callback="open_url",
-                params=[
-                    "https://github.com/cibere/Flow.Launcher.Plugin.WordNikDictionary?tab=readme-ov-file#get-an-api-key"
-                ],
+        timeout = kwargs.pop("timeout", None)
+        max_attempts = (
+            BACKGROUND_MAX_ATTEMPTS if self.background else INTERACTIVE_MAX_ATTEMPTS
+        )
+        # only GET requests are safe to send again
+        if method.upper() != "GET":
+            max_retries = 0
+        elif self.background:
+            max_retries = BACKGROUND_MAX_RETRIES
+        else:
+            max_retries = INTERACTIVE_MAX_RETRIES
+        attempt = 0
+        failures = 0
+        rejected: set[str] = set()
+        while True:
+            if self.flow.context.cancelled:
+                # the request this was sent for is already done
+                raise self._deadline_exceeded()
+            if self.flow.deadline.remaining() < DEADLINE_MARGIN:
+                raise self._deadline_exceeded()
+            delay = self.circuit.allow()
+            if delay:
+                raise self._unavailable(delay)
+            key = self._wait_for_quota(keys)
+            params["api_key"] = key
+            try:
+                with self.flow.metrics.span("http"):
+                    key, res = self._fetch(
+                        key,
+                        keys,
+                        method,
+                        url,
+                        params=params,
+                        headers=headers,
+                        timeout=timeout or self.get_timeout(),
+                        **kwargs,
+                    )
+                if res.status_code >= 500:
+                    LOG.warning(
+                        "Wordnik returned a server error. status_code=%r, url=%r",
+                        res.status_code,
+                        url,
+                    )
+                    raise self._server_error(res.status_code)
+            except UnavailableException:
+                if self.flow.deadline.expired:
+                    # the request was cut short by the deadline, which says nothing about whether wordnik is up
+                    raise self._deadline_exceeded()
+                self.circuit.record_failure()
+                failures += 1
+                delay = min(RETRY_BACKOFF_BASE * 2 ** (failures - 1), RETRY_BACKOFF_MAX)
+                delay = random.uniform(0, delay)
+                if (
+                    failures > max_retries
+                    or delay + DEADLINE_MARGIN > self.flow.deadline.remaining()
+                ):
+                    raise
+                LOG.info("Retrying HTTP request in %.2fs. url=%r", delay, url)
+                time.sleep(delay)
+                continue
+            self.circuit.record_success()
+
+            if res.status_code == 401:
+                self.ratelimiter.disable(key)
+                rejected.add(key)
+                if len(rejected) == len(keys):
+                    raise self._invalid_api_key()
+                # try the other keys, until wordnik has rejected all of them
+                continue
+            if res.status_code != 429:
+                self.ratelimiter.update(key, res.headers)
+                break
+            attempt += 1
+            delay = self.ratelimiter.penalize(key, self._get_retry_after(res))
+            if attempt == max_attempts:
+                raise self._rate_limited(delay)
+
+        if not res.ok and res.status_code != 404:
+            LOG.warning(
+                "Wordnik returned an error. status_code=%r, data=%s",
+                res.status_code,
+                Truncated(res.text, get_payload_limit(self.settings)),
             )
-            raise PluginException(opt.title, [opt])
-        elif res.status_code == 404:
-            if raise_wnf_on_404:
-                raise PluginException.wnf()
+            raise PluginException.create(
+                f"Wordnik returned an error (HTTP {res.status_code})",
+                sub="Try again, or open a github issue if this keeps happening",
+                icon="error",
+            )
+
+        try:
+            data = res.json()
+        except ValueError as e:
+            LOG.warning("Wordnik sent a response that isn't JSON", exc_info=e)
+            raise UnavailableException.create(
+                "Wordnik sent an invalid response",
+                sub="Try again in a bit",
+                icon="error",
+            ) from e
+        LOG.debug(
+            "Received HTTP response. status_code=%r, headers=%r, data=%s",
+            res.status_code,
+            res.headers,
+            Truncated(data, get_payload_limit(self.settings)),
+        )
+        return res.status_code, data
+
+    def _fetch(
+        self,
+        key: str,
+        keys: list[str],
+        method: str,
+        url: str,
+        *,
+        params: dict[str, Any],
+        **kwargs,
+    ) -> tuple[str, requests.Response]:
+        """
+        Sends the request with `key`. If hedging is turned on and there's no response after `hedge_after` seconds, an identical request is sent alongside it, and whichever succeeds first is used. Returns the key the response was sent with, and the response.
+        """
+
+        hedge_after = self.hedge_after
+        if hedge_after is None or self.background or method.upper() != "GET":
+            return key, self._request(method, url, params=params, **kwargs)
+
+        outcomes: queue.SimpleQueue[
+            tuple[str, requests.Response | None, BaseException | None]
+        ] = queue.SimpleQueue()
+
+        def send(key: str) -> None:
+            try:
+                res = self._request(
+                    method, url, params={**params, "api_key": key}, **kwargs
+                )
+            except BaseException as e:
+                outcomes.put((key, None, e))
             else:
-                return data
+                outcomes.put((key, res, None))
+
+        # daemon threads, so that the request that lost the race doesn't keep the process alive once the results are sent
+        threading.Thread(target=send, args=(key,), daemon=True).start()
+        sent = 1
+        try:
+            outcome = outcomes.get(timeout=hedge_after)
+        except queue.Empty:
+            hedge_key, delay = self.ratelimiter.acquire(keys)
+            if not delay:
+                LOG.debug(
+                    "No response after %.2fs, sending a hedged request. url=%r",
+                    hedge_after,
+                    url,
+                )
+                threading.Thread(target=send, args=(hedge_key,), daemon=True).start()
+                sent += 1
+            outcome = outcomes.get()
 
-        res.raise_for_status()
+        received = 1
+        while outcome[2] is not None and received < sent:
+            outcome = outcomes.get()
+            received += 1
+        key, res, error = outcome
+        if error is not None:
+            raise error
+        assert res is not None
+        return key, res
 
-        return data
+    def _request(self, method: str, url: str, **kwargs) -> requests.Response:
+        import requests
+
+        try:
+            return self.session.request(method, url, **kwargs)
+        except requests.Timeout as e:
+            LOG.warning("HTTP request timed out. url=%r", url, exc_info=e)
+            opt = Option(
+                title="Wordnik took too long to respond",
+                sub="Try again in a bit, or raise the timeouts in settings",
+                callback="open_settings_menu",
+                icon="error",
+            )
+            raise UnavailableException(opt.title, [opt]) from e
+        except requests.ConnectionError as e:
+            LOG.warning("Unable to connect to wordnik. url=%r", url, exc_info=e)
+            opt = Option(
+                title="Unable to connect to Wordnik",
+                sub="Check your internet connection, and try again",
+                icon="error",
+            )
+            raise UnavailableException(opt.title, [opt]) from e
+        except requests.RequestException as e:
+            LOG.warning("HTTP request failed. url=%r", url, exc_info=e)
+            raise UnavailableException.create(
+                "Unable to get a response from Wordnik",
+                sub="Try again in a bit",
+                icon="error",
+            ) from e
+
+    def _wait_for_quota(self, keys: list[str]) -> str:
+        """
+        Waits until one of the keys has quota left, and returns it.
+        """
+
+        max_wait = BACKGROUND_MAX_WAIT if self.background else INTERACTIVE_MAX_WAIT
+        deadline = time.monotonic() + min(max_wait, self.flow.deadline.remaining())
+        while True:
+            key, delay = self.ratelimiter.acquire(keys, background=self.background)
+            if not delay:
+                return key
+            if delay == math.inf:
+                raise self._invalid_api_key()
+            if time.monotonic() + delay > deadline:
+                raise self._rate_limited(delay)
+            LOG.debug("Waiting %.2fs for rate limit quota", delay)
+            time.sleep(delay)
+
+    @staticmethod
+    def _invalid_api_key() -> PluginException:
+        opt = Option(
+            title="Invalid API Key",
+            sub="Click ENTER for instructions on how to get a valid API key",
+            callback="open_url",
+            params=[
+                "https://github.com/cibere/Flow.Launcher.Plugin.WordNikDictionary?tab=readme-ov-file#get-an-api-key"
+            ],
+        )
+        return PluginException(opt.title, [opt])
+
+    @staticmethod
+    def _get_retry_after(res: requests.Response) -> float | None:
+        try:
+            return float(res.headers["Retry-After"])
+        except (KeyError, ValueError):
+            return None
+
+    def _deadline_exceeded(self) -> DeadlineExceededException:
+        self.flow.partial_results = True
+        return DeadlineExceededException.create(
+            "Wordnik took too long to respond",
+            sub="Try again, or raise the query deadline in settings",
+            callback="open_settings_menu",
+            icon="error",
+        )
+
+    @staticmethod
+    def _unavailable(delay: float) -> UnavailableException:
+        return UnavailableException.create(
+            "Wordnik is currently unavailable",
+            sub=f"Requests are paused after several failures, trying again in {max(delay, 1):.0f} seconds",
+            icon="error",
+        )
+
+    @staticmethod
+    def _server_error(status: int) -> UnavailableException:
+        return UnavailableException.create(
+            f"Wordnik is having problems (HTTP {status})",
+            sub="Try again in a bit",
+            icon="error",
+        )
+
+    def _rate_limited(self, delay: float) -> RateLimitedException:
+        return RateLimitedException.create(
+            "Wordnik's rate limit has been reached",
+            sub=f"Try again in {max(delay, 1):.0f} seconds",
+            icon="error",
+        )
 
     def fetch_definitions(self, word: str) -> list[dict[str, Any]]:
         """
@@ -114,37 +600,104 @@ class HTTPClient:
 
         return self.request("GET", endpoint, params=params)
 
-    def fetch_similiar_words(self, word: str) -> list[dict[str, Any]]:
+    def fetch_similiar_words(
+        self,
+        word: str,
+        *,
+        types: list[str] | None = None,
+        limit: int | None = None,
+        cached_only: bool = False,
+    ) -> list[dict[str, Any]] | None:
         """
         Docs on the endpoint
         https://developer.wordnik.com/docs#!/word/getRelatedWords
+
+        `limit` is the max number of words per relationship type, and defaults to the results setting. If `types` is given, only those relationship types are fetched.
         """
 
-        try:
-            limit = int(self.settings["results"])
-        except ValueError:
-            opt = Option(
-                title="Error: Invalid Results Value Given.",
-                sub="The Results settings item must be a valid number.",
-                callback="open_settings_menu",
-            )
-            raise PluginException(opt.title, [opt])
+        if limit is None:
+            try:
+                limit = int(self.settings["results"])
+            except ValueError:
+                opt = Option(
+                    title="Error: Invalid Results Value Given.",
+                    sub="The Results settings item must be a valid number.",
+                    callback="open_settings_menu",
+                )
+                raise PluginException(opt.title, [opt])
 
-        params = {
-            "limit": limit,
+        params: dict[str, Any] = {
+            "limitPerRelationshipType": limit,
         }
+        if types:
+            params["relationshipTypes"] = ",".join(types)
         endpoint = f"/word.json/{quote_plus(word)}/relatedWords"
 
-        return self.request("GET", endpoint, params=params)
+        return self.request("GET", endpoint, params=params, cached_only=cached_only)
 
-    def fetch_word_list_file(self) -> Any:
+    def download_word_list_file(self, loc: str) -> bool:
         """
         Source: https://github.com/dwyl/english-words
+
+        Streams the word list into a temp file next to `loc`, then swaps it in, so other processes never read a half written list. The ETag and Last-Modified headers of the download are saved to `<loc>.meta`, so that when the list hasn't changed, the next download is a single 304 response. Returns `True` if the file at `loc` changed.
         """
-        url = "https://raw.githubusercontent.com/dwyl/english-words/refs/heads/master/words_alpha.txt"
-        res = requests.get(url)
-        res.raise_for_status()
-        return res.content
+
+        import requests
+
+        meta_loc = f"{loc}.meta"
+        headers = {}
+        if os.path.exists(loc):
+            try:
+                with open(meta_loc, "r", encoding="UTF-8") as f:
+                    meta = json.load(f)
+            except (OSError, ValueError):
+                meta = {}
+            if meta.get("etag"):
+                headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                headers["If-Modified-Since"] = meta["last_modified"]
+
+        res = self._request(
+            "GET", WORD_LIST_URL, headers=headers, timeout=self.timeout, stream=True
+        )
+        with res:
+            if res.status_code == 304:
+                LOG.info("Word list hasn't changed since it was last downloaded")
+                return False
+            if not res.ok:
+                LOG.warning(
+                    "Unable to download word list. status_code=%r", res.status_code
+                )
+                raise PluginException.create(
+                    f"Unable to download word list, got HTTP {res.status_code}",
+                    icon="error",
+                )
+
+            temp_loc = f"{loc}.{os.getpid()}.tmp"
+            try:
+                with open(temp_loc, "wb") as f:
+                    for chunk in res.iter_content(chunk_size=WORD_LIST_CHUNK_SIZE):
+                        f.write(chunk)
+                os.replace(temp_loc, loc)
+            except BaseException as e:
+                with contextlib.suppress(OSError):
+                    os.remove(temp_loc)
+                if isinstance(e, requests.RequestException):
+                    LOG.warning("Word list download was interrupted", exc_info=e)
+                    raise PluginException.create(
+                        "Word list download was interrupted, try again",
+                        icon="error",
+                    ) from e
+                raise
+            meta = {
+                "etag": res.headers.get("ETag"),
+                "last_modified": res.headers.get("Last-Modified"),
+            }
+
+        with open(meta_loc, "w", encoding="UTF-8") as f:
+            json.dump(meta, f)
+        LOG.info("Downloaded word list to %r", loc)
+        return True
 
     def fetch_scrabble_score(self, word: str) -> dict[str, int]:
         """
@@ -154,4 +707,4 @@ class HTTPClient:
 
         endpoint = f"/word.json/{quote_plus(word)}/scrabbleScore"
 
-        return self.request("GET", endpoint, raise_wnf_on_404=False)
\ No newline at end of file
+        return self.request("GET", endpoint, raise_wnf_on_404=False)
@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+import contextlib
+import json
+import os
+import threading
+import time
+from collections import deque
+from logging import getLogger
+from typing import Any, Iterator
+
+__all__ = ("Metrics", "capture_profile")
+
+LOG = getLogger(__name__)
+
+DEFAULT_METRICS_LOC = "wordnik.metrics"
+DEFAULT_PROFILES_LOC = "wordnik.profiles"
+DEFAULT_MAX_SIZE = 1000000
+MAX_PROFILES = 20
+
+# the order phases are shown in by the `stats` modifier, any others are shown after these
+PHASES = [
+    "total",
+    "startup",
+    "rpc_parse",
+    "handle",
+    "cache",
+    "http",
+    "offline",
+    "parse_definitions",
+    "completions",
+    "spellcheck",
+    "serialize",
+]
+
+
+def percentile(values: list[float], pct: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+class Metrics:
+    """
+    Times the phases of handling a request, ex: the http round trip or spellchecking, and appends them to a rolling JSONL file once the request is done.
+
+    Phases that run more than once in a request, like several http requests for an overview, are added together.
+    """
+
+    def __init__(
+        self, loc: str = DEFAULT_METRICS_LOC, *, max_size: int = DEFAULT_MAX_SIZE
+    ) -> None:
+        self.loc = loc
+        self.max_size = max_size
+        self.spans: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def record(self, name: str, seconds: float) -> None:
+        with self._lock:
+            self.spans[name] = self.spans.get(name, 0) + seconds * 1000
+
+    @contextlib.contextmanager
+    def span(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def clear(self) -> None:
+        with self._lock:
+            self.spans = {}
+
+    def flush(self, **fields: Any) -> None:
+        """
+        Appends the recorded spans to the metrics file as one JSON line, along with `fields`, then clears them.
+        """
+
+        with self._lock:
+            spans, self.spans = self.spans, {}
+        if not spans:
+            return
+
+        entry = {
+            "time": round(time.time(), 3),
+            **fields,
+            "spans": {name: round(ms, 3) for name, ms in spans.items()},
+        }
+        try:
+            if os.path.exists(self.loc) and os.path.getsize(self.loc) > self.max_size:
+                os.replace(self.loc, f"{self.loc}.1")
+            with open(self.loc, "a", encoding="UTF-8") as f:
+                f.write(json.dumps(entry) + "\n")
+        except OSError as e:
+            LOG.warning("Unable to write to metrics file", exc_info=e)
+
+    def read(self, limit: int = 500) -> list[dict[str, Any]]:
+        entries: deque[dict[str, Any]] = deque(maxlen=limit)
+        for loc in (f"{self.loc}.1", self.loc):
+            try:
+                with open(loc, "r", encoding="UTF-8") as f:
+                    for line in f:
+                        try:
+                            entries.append(json.loads(line))
+                        except ValueError:
+                            continue
+            except FileNotFoundError:
+                continue
+        return list(entries)
+
+    def get_percentiles(
+        self, limit: int = 500
+    ) -> dict[str, tuple[int, float, float, float]]:
+        """
+        Returns the sample count, p50, p95 and p99 of each phase over the last `limit` requests, in milliseconds.
+        """
+
+        timings: dict[str, list[float]] = {}
+        for entry in self.read(limit):
+            for name, ms in entry.get("spans", {}).items():
+                timings.setdefault(name, []).append(ms)
+
+        order = {name: idx for idx, name in enumerate(PHASES)}
+        return {
+            name: (
+                len(values),
+                percentile(values, 50),
+                percentile(values, 95),
+                percentile(values, 99),
+            )
+            for name, values in sorted(
+                timings.items(),
+                key=lambda item: (order.get(item[0], len(order)), item[0]),
+            )
+        }
+
+
+@contextlib.contextmanager
+def capture_profile(name: str, loc: str = DEFAULT_PROFILES_LOC) -> Iterator[None]:
+    """
+    Profiles the block with cProfile, and saves the stats to `loc`, keeping only the latest `MAX_PROFILES` of them. The saved files can be opened with `pstats` or a viewer like snakeviz.
+    """
+
+    import cProfile
+
+    profile = cProfile.Profile()
+    profile.enable()
+    try:
+        yield
+    finally:
+        profile.disable()
+        try:
+            os.makedirs(loc, exist_ok=True)
+            profile.dump_stats(os.path.join(loc, f"{time.time_ns()}-{name}.prof"))
+            profiles = sorted(os.listdir(loc))
+            for filename in profiles[:-MAX_PROFILES]:
+                os.remove(os.path.join(loc, filename))
+        except OSError as e:
+            LOG.warning("Unable to save profile", exc_info=e)
@@ -0,0 +1,162 @@
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import threading
+from logging import getLogger
+from typing import Any, Iterable, Iterator
+from urllib.parse import quote
+
+from .utils import open_db
+
+__all__ = ("OfflineDictionary",)
+
+LOG = getLogger(__name__)
+
+DEFAULT_OFFLINE_LOC = "WordnikDictionary/offline.sqlite3"
+
+SOURCES: dict[str, tuple[str, str]] = {
+    "wordnet": (
+        "from WordNet 3.0 Copyright 2006 by Princeton University. All rights reserved.",
+        "https://wordnet.princeton.edu/",
+    ),
+    "wiktionary": (
+        "from Wiktionary, Creative Commons Attribution/Share-Alike License.",
+        "https://creativecommons.org/licenses/by-sa/3.0/",
+    ),
+}
+
+WORDNET_FILES = {
+    "data.noun": "noun",
+    "data.verb": "verb",
+    "data.adj": "adjective",
+    "data.adv": "adverb",
+}
+
+# wiktextract's part of speech names, mapped to the ones wordnik uses
+WIKTIONARY_POS = {
+    "adj": "adjective",
+    "adv": "adverb",
+    "intj": "interjection",
+    "pron": "pronoun",
+    "prep": "preposition",
+    "conj": "conjunction",
+    "abbrev": "abbreviation",
+    "name": "proper-noun",
+    "det": "article",
+}
+
+SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS definitions USING fts5(
+    word,
+    part_of_speech UNINDEXED,
+    text,
+    source UNINDEXED
+);
+"""
+
+
+def iter_wordnet(loc: str) -> Iterator[tuple[str, str, str]]:
+    """
+    Yields `(word, part of speech, definition)` from a WordNet 3.x `dict` folder, which contains the `data.noun`, `data.verb`, `data.adj` and `data.adv` files.
+    """
+
+    for filename, part_of_speech in WORDNET_FILES.items():
+        with open(os.path.join(loc, filename), "r", encoding="UTF-8") as f:
+            for line in f:
+                # the license is at the top of each file, and every line of it starts with two spaces
+                if line.startswith("  ") or " | " not in line:
+                    continue
+                fields, gloss = line.split(" | ", 1)
+                parts = fields.split()
+                word_count = int(parts[3], 16)
+                for word in parts[4 : 4 + word_count * 2 : 2]:
+                    # adjectives can have a syntactic marker, ex: `galore(ip)`
+                    word = word.split("(", 1)[0].replace("_", " ")
+                    yield word, part_of_speech, gloss.strip()
+
+
+def iter_wiktionary(loc: str) -> Iterator[tuple[str, str, str]]:
+    """
+    Yields `(word, part of speech, definition)` from a wiktextract JSONL dump, like the ones from https://kaikki.org
+    """
+
+    with open(loc, "r", encoding="UTF-8") as f:
+        for line in f:
+            data = json.loads(line)
+            if data.get("lang_code", "en") != "en" or "word" not in data:
+                continue
+            part_of_speech = data.get("pos", "")
+            part_of_speech = WIKTIONARY_POS.get(part_of_speech, part_of_speech)
+            for sense in data.get("senses", []):
+                for gloss in sense.get("glosses", [])[-1:]:
+                    yield data["word"], part_of_speech, gloss
+
+
+IMPORTERS = {
+    "wordnet": iter_wordnet,
+    "wiktionary": iter_wiktionary,
+}
+
+
+class OfflineDictionary:
+    """
+    A local dictionary, imported from an open dump (WordNet or Wiktionary) into a SQLite FTS5 table.
+
+    Lookups return the same data shape as the wordnik definitions endpoint, so they can go through `Definition.from_json`.
+    """
+
+    def __init__(self, loc: str = DEFAULT_OFFLINE_LOC) -> None:
+        self.loc = loc
+        self._lock = threading.Lock()
+        self._conn: sqlite3.Connection | None = None
+
+    @property
+    def exists(self) -> bool:
+        return os.path.exists(self.loc)
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        if self._conn is None:
+            # imports rely on `with self.conn` to run in one transaction, so this one isn't in autocommit mode
+            self._conn = open_db(self.loc, SCHEMA, isolation_level="")
+        return self._conn
+
+    def import_dump(self, source: str, loc: str) -> int:
+        rows: Iterable[tuple[str, str, str]] = IMPORTERS[source](loc)
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM definitions WHERE source = ?", (source,))
+            cursor = self.conn.executemany(
+                "INSERT INTO definitions (word, part_of_speech, text, source) VALUES (?, ?, ?, ?)",
+                ((word, pos, text, source) for word, pos, text in rows),
+            )
+            count = cursor.rowcount
+            self.conn.execute(
+                "INSERT INTO definitions (definitions) VALUES ('optimize')"
+            )
+        LOG.info("Imported %d definitions from %s dump %r", count, source, loc)
+        return count
+
+    def lookup(self, word: str, *, limit: int = 20) -> list[dict[str, Any]]:
+        phrase = '"' + word.replace('"', '""') + '"'
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT word, part_of_speech, text, source FROM definitions WHERE definitions MATCH ? AND lower(word) = lower(?) ORDER BY rowid LIMIT ?",
+                (f"word : {phrase}", word, limit),
+            ).fetchall()
+
+        final = []
+        for found_word, part_of_speech, text, source in rows:
+            attribution_text, attribution_url = SOURCES[source]
+            final.append(
+                {
+                    "word": found_word,
+                    "partOfSpeech": part_of_speech or None,
+                    "text": text,
+                    "attributionText": attribution_text,
+                    "attributionUrl": attribution_url,
+                    "wordnikUrl": f"https://www.wordnik.com/words/{quote(found_word)}",
+                }
+            )
+        return final
@@ -14,6 +14,7 @@ class Option:
         callback: str | None = None,
         params: list[Any] = [],
         context_data: list[Option] = [],
+        context_key: list[Any] | None = None,
         hide_after_callback: bool = True,
         score: int = 0,
         icon: str = "app",
@@ -25,6 +26,8 @@ class Option:
         self.params = params
         self.score = score
         self.context_data = context_data
+        # when set, this is sent to flow instead of the context menu, and the context menu is only built once it's opened
+        self.context_key = context_key
         self.hide_after_callback = (
             False if callback == "change_query" else hide_after_callback
         )
@@ -42,7 +45,11 @@ class Option:
             "Title": self.title,
             "SubTitle": str(self.sub),
             "IcoPath": self.icon,
-            "ContextData": [opt.to_jsonrpc() for opt in self.context_data],
+            "ContextData": (
+                self.context_key
+                if self.context_key is not None
+                else [opt.to_jsonrpc() for opt in self.context_data]
+            ),
             "score": self.score,
         }
         if self.callback:
@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import json
+import threading
+from logging import getLogger
+from typing import TYPE_CHECKING, Any
+
+from .errors import BasePluginException, BudgetExhaustedException, RateLimitedException
+from .utils import spawn_detached
+
+if TYPE_CHECKING:
+    from .core import WordnikDictionaryPlugin
+
+__all__ = ("Prefetcher", "run_prefetch_worker")
+
+LOG = getLogger(__name__)
+
+DEFAULT_BUDGET = 100
+
+# job kinds, mapped to the HTTPClient method that warms the cache for them
+FETCH_METHODS = {
+    "definitions": "fetch_definitions",
+    "syllables": "fetch_syllables",
+    "similiar": "fetch_similiar_words",
+    "scrabble": "fetch_scrabble_score",
+}
+
+
+def run_jobs(
+    plugin: WordnikDictionaryPlugin, jobs: list[tuple[str, str]], refresh: float = 0
+) -> None:
+    plugin.http.background = True
+    plugin.http.background_budget = get_budget(plugin.settings)
+    plugin.http.refresh_within = refresh
+
+    for kind, word in jobs:
+        try:
+            getattr(plugin.http, FETCH_METHODS[kind])(word)
+        except (BudgetExhaustedException, RateLimitedException):
+            LOG.info("Prefetch budget used up, skipping the rest of the jobs")
+            return
+        except BasePluginException:
+            pass
+        except Exception as e:
+            LOG.warning(
+                "Error happened while prefetching %r for %r", kind, word, exc_info=e
+            )
+
+
+def get_budget(settings: dict[str, Any]) -> int:
+    try:
+        return int(settings["prefetch_budget"])
+    except (KeyError, ValueError):
+        return DEFAULT_BUDGET
+
+
+def run_prefetch_worker(args: str, settings: str) -> None:
+    """
+    Entry point for the detached prefetch process started by `Prefetcher.schedule`. The jobs are given as an argument, and the settings through stdin, since they hold the api keys.
+    """
+
+    from .core import WordnikDictionaryPlugin
+    from .utils import apply_logging_settings
+
+    payload = json.loads(args)
+    plugin_settings = json.loads(settings)
+    apply_logging_settings(plugin_settings)
+    plugin = WordnikDictionaryPlugin()
+    plugin.rpc_request = {"settings": plugin_settings}
+    run_jobs(
+        plugin,
+        [(kind, word) for kind, word in payload["jobs"]],
+        payload.get("refresh", 0),
+    )
+
+
+class Prefetcher:
+    """
+    Warms the response cache for the lookups a user is likely to make next, ex: the top spellcheck suggestions, or the related words of a word they just looked up.
+
+    Prefetching runs in a detached process so that it never slows down the query that triggered it, or in a background thread when running in persistent server mode. Either way the requests it sends come out of an hourly budget that's shared between processes.
+    """
+
+    def __init__(self, flow: WordnikDictionaryPlugin) -> None:
+        self.flow = flow
+
+    @property
+    def enabled(self) -> bool:
+        settings = self.flow.settings
+        return settings.get("prefetch", False) and settings.get("cache_enabled", True)
+
+    def schedule(
+        self,
+        jobs: list[tuple[str, str]],
+        *,
+        refresh: float = 0,
+        force: bool = False,
+    ) -> None:
+        """
+        Runs `jobs` in the background. Cached responses that expire within `refresh` seconds are fetched again. If `force` is set, the jobs run even if prefetching is turned off, as long as the cache is enabled.
+        """
+
+        if not jobs or self.flow.context.cancelled:
+            return
+        if not (self.enabled or (force and self.flow.http.cache_enabled)):
+            return
+
+        LOG.debug("Scheduling prefetch jobs: %r", jobs)
+        if self.flow.persistent:
+            worker = self.flow.__class__()
+            worker.rpc_request = {"settings": self.flow.settings}
+            threading.Thread(
+                target=run_jobs, args=(worker, jobs, refresh), daemon=True
+            ).start()
+            return
+
+        payload = json.dumps({"jobs": jobs, "refresh": refresh})
+        spawn_detached(["--prefetch", payload], stdin=json.dumps(self.flow.settings))
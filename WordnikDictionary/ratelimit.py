@@ -0,0 +1,282 @@
+from __future__ import annotations
+
+import hashlib
+import math
+import random
+import sqlite3
+import threading
+import time
+from logging import getLogger
+from typing import Any, Mapping
+
+from .utils import open_db, transaction
+
+__all__ = ("RateLimiter",)
+
+LOG = getLogger(__name__)
+
+DEFAULT_RATELIMIT_LOC = "WordnikDictionary/ratelimit.sqlite3"
+
+# wordnik reports a quota for each of these windows, ex: `X-RateLimit-Remaining-Hour`
+WINDOWS: dict[str, int] = {
+    "minute": 60,
+    "hour": 60 * 60,
+}
+
+# the share of each window's quota that background work can't touch, so that it's left for interactive queries
+BACKGROUND_RESERVE = 0.25
+
+BACKOFF_BASE = 1
+BACKOFF_MAX = 60
+
+# how long a key that wordnik rejected is left out of rotation for
+KEY_COOLDOWN = 10 * 60
+
+# bump this when the schema changes, the old state is thrown out since it's only a cache of what wordnik reports
+SCHEMA_VERSION = 1
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS quotas (
+    key TEXT NOT NULL,
+    window TEXT NOT NULL,
+    quota INTEGER NOT NULL,
+    tokens REAL NOT NULL,
+    updated REAL NOT NULL,
+    PRIMARY KEY (key, window)
+);
+CREATE TABLE IF NOT EXISTS keys (
+    key TEXT PRIMARY KEY,
+    backoff_until REAL NOT NULL DEFAULT 0,
+    strikes INTEGER NOT NULL DEFAULT 0,
+    disabled_until REAL NOT NULL DEFAULT 0
+);
+"""
+
+
+def get_key_id(key: str) -> str:
+    """
+    Api keys are stored hashed, so that the rate limit database doesn't hold them in plain text.
+    """
+
+    return hashlib.sha256(key.encode()).hexdigest()[:16]
+
+
+def mask_key(key: str) -> str:
+    return f"{key[:4]}...{key[-4:]}" if len(key) > 8 else "****"
+
+
+class RateLimiter:
+    """
+    A token bucket for each of wordnik's rate limit windows, per api key, shared between plugin processes through a SQLite database.
+
+    Buckets are sized from the `X-RateLimit-*` headers of the last response with that key, and refill at the rate the window allows. Until the first response comes in, a key's requests aren't limited at all. Background requests have to leave `BACKGROUND_RESERVE` of each bucket untouched, so that interactive queries still go through when the quota runs low.
+
+    When several keys are given, each request goes to the key with the largest share of its quota left. Keys that are backing off from a 429, or that wordnik rejected, are skipped.
+    """
+
+    def __init__(self, loc: str = DEFAULT_RATELIMIT_LOC) -> None:
+        self.loc = loc
+        self._lock = threading.Lock()
+        self._conn: sqlite3.Connection | None = None
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = open_db(
+                self.loc,
+                SCHEMA,
+                version=SCHEMA_VERSION,
+                drop="DROP TABLE IF EXISTS quotas; DROP TABLE IF EXISTS backoff; DROP TABLE IF EXISTS keys;",
+            )
+        return self._conn
+
+    def acquire(
+        self, keys: list[str], *, background: bool = False
+    ) -> tuple[str, float]:
+        """
+        Picks a key and takes a token from each of its buckets. Returns the key and `0` if the request can be sent now.
+
+        Otherwise no tokens were taken, and the delay is the number of seconds to wait before trying again, or `math.inf` if no keys were given.
+        """
+
+        now = time.time()
+        try:
+            with self._lock:
+                with transaction(self.conn):
+                    result = self._acquire(now, keys, background)
+        except sqlite3.Error as e:
+            LOG.warning("Unable to read rate limit state", exc_info=e)
+            return random.choice(keys), 0
+        return result
+
+    def _acquire(
+        self, now: float, keys: list[str], background: bool
+    ) -> tuple[str, float]:
+        ids = {get_key_id(key): key for key in keys}
+        placeholders = ", ".join("?" * len(ids))
+        states = {
+            key_id: (backoff_until, disabled_until)
+            for key_id, backoff_until, disabled_until in self.conn.execute(
+                f"SELECT key, backoff_until, disabled_until FROM keys WHERE key IN ({placeholders})",
+                list(ids),
+            )
+        }
+        quotas: dict[str, list[tuple[str, int, float, float]]] = {}
+        for key_id, *row in self.conn.execute(
+            f"SELECT key, window, quota, tokens, updated FROM quotas WHERE key IN ({placeholders})",
+            list(ids),
+        ):
+            quotas.setdefault(key_id, []).append(tuple(row))
+
+        # if wordnik rejected every key, they're all tried again rather than locking the plugin out for the cooldown, since a new key can take a while to be activated
+        skip_disabled = any(states.get(key_id, (0, 0))[1] <= now for key_id in ids)
+
+        best: tuple[float, str, list[tuple[float, float, str, str]]] | None = None
+        delay = math.inf
+        # shuffled so that keys with the same share of their quota left take turns
+        for key_id in random.sample(list(ids), len(ids)):
+            backoff_until, disabled_until = states.get(key_id, (0, 0))
+            if skip_disabled and disabled_until > now:
+                continue
+            if backoff_until > now:
+                delay = min(delay, backoff_until - now)
+                continue
+
+            buckets = []
+            key_delay = 0.0
+            share = math.inf
+            for window, quota, tokens, updated in quotas.get(key_id, []):
+                if quota <= 0 or window not in WINDOWS:
+                    continue
+                rate = quota / WINDOWS[window]
+                tokens = min(quota, tokens + (now - updated) * rate)
+                floor = quota * BACKGROUND_RESERVE if background else 0
+                if tokens - 1 < floor:
+                    key_delay = max(key_delay, (floor + 1 - tokens) / rate)
+                share = min(share, (tokens - floor) / quota)
+                buckets.append((tokens - 1, now, key_id, window))
+
+            if key_delay:
+                delay = min(delay, key_delay)
+            elif best is None or share > best[0]:
+                best = (share, key_id, buckets)
+
+        if best is None:
+            return keys[0], delay
+        _, key_id, buckets = best
+        self.conn.executemany(
+            "UPDATE quotas SET tokens = ?, updated = ? WHERE key = ? AND window = ?",
+            buckets,
+        )
+        return ids[key_id], 0
+
+    def update(self, key: str, headers: Mapping[str, str]) -> None:
+        """
+        Syncs the key's buckets with the quota wordnik reported in a successful response's headers, and clears its backoff.
+        """
+
+        now = time.time()
+        key_id = get_key_id(key)
+        rows = []
+        for window in WINDOWS:
+            try:
+                quota = int(headers[f"X-RateLimit-Limit-{window.title()}"])
+                remaining = int(headers[f"X-RateLimit-Remaining-{window.title()}"])
+            except (KeyError, ValueError):
+                continue
+            rows.append((key_id, window, quota, remaining, now))
+
+        try:
+            with self._lock:
+                self.conn.executemany(
+                    "INSERT OR REPLACE INTO quotas (key, window, quota, tokens, updated) VALUES (?, ?, ?, ?, ?)",
+                    rows,
+                )
+                self.conn.execute(
+                    "UPDATE keys SET strikes = 0, disabled_until = 0 WHERE key = ? AND (strikes != 0 OR disabled_until != 0)",
+                    (key_id,),
+                )
+        except sqlite3.Error as e:
+            LOG.warning("Unable to write rate limit state", exc_info=e)
+
+    def penalize(self, key: str, retry_after: float | None = None) -> float:
+        """
+        Records a 429 response, and holds back every process' requests with the key, with an exponential, jittered backoff (or for `retry_after` seconds if wordnik sent one). Returns how long the key is held back for.
+        """
+
+        now = time.time()
+        key_id = get_key_id(key)
+        try:
+            with self._lock:
+                (strikes,) = self.conn.execute(
+                    "INSERT INTO keys (key, strikes) VALUES (?, 1) ON CONFLICT(key) DO UPDATE SET strikes = strikes + 1 RETURNING strikes",
+                    (key_id,),
+                ).fetchall()[0]
+                if retry_after is None:
+                    delay = min(BACKOFF_BASE * 2 ** (strikes - 1), BACKOFF_MAX)
+                    delay = random.uniform(delay / 2, delay)
+                else:
+                    delay = retry_after
+                self.conn.execute(
+                    "UPDATE keys SET backoff_until = MAX(backoff_until, ?) WHERE key = ?",
+                    (now + delay, key_id),
+                )
+                self.conn.execute(
+                    "UPDATE quotas SET tokens = MIN(tokens, 0), updated = ? WHERE key = ?",
+                    (now, key_id),
+                )
+        except sqlite3.Error as e:
+            LOG.warning("Unable to write rate limit state", exc_info=e)
+            return BACKOFF_BASE
+        LOG.info(
+            "Rate limited by wordnik, backing off %s for %.2fs", mask_key(key), delay
+        )
+        return delay
+
+    def disable(self, key: str, cooldown: float = KEY_COOLDOWN) -> None:
+        """
+        Takes a key that wordnik rejected out of rotation for `cooldown` seconds, as long as there are other keys to use instead.
+        """
+
+        try:
+            with self._lock:
+                self.conn.execute(
+                    "INSERT INTO keys (key, disabled_until) VALUES (?, ?) ON CONFLICT(key) DO UPDATE SET disabled_until = excluded.disabled_until",
+                    (get_key_id(key), time.time() + cooldown),
+                )
+        except sqlite3.Error as e:
+            LOG.warning("Unable to write rate limit state", exc_info=e)
+        LOG.warning("Wordnik rejected api key %s, skipping it for now", mask_key(key))
+
+    def get_health(self, keys: list[str]) -> list[dict[str, Any]]:
+        """
+        Returns the state of each key, ex: whether it's usable, and how much of each window's quota it has left.
+        """
+
+        now = time.time()
+        health = []
+        with self._lock:
+            for key in keys:
+                key_id = get_key_id(key)
+                row = self.conn.execute(
+                    "SELECT backoff_until, disabled_until FROM keys WHERE key = ?",
+                    (key_id,),
+                ).fetchone()
+                backoff_until, disabled_until = row or (0, 0)
+                quotas = {}
+                for window, quota, tokens, updated in self.conn.execute(
+                    "SELECT window, quota, tokens, updated FROM quotas WHERE key = ?",
+                    (key_id,),
+                ):
+                    if quota > 0 and window in WINDOWS:
+                        rate = quota / WINDOWS[window]
+                        tokens = min(quota, tokens + (now - updated) * rate)
+                        quotas[window] = (max(int(tokens), 0), quota)
+                health.append(
+                    {
+                        "key": mask_key(key),
+                        "disabled": max(disabled_until - now, 0),
+                        "backoff": max(backoff_until - now, 0),
+                        "quotas": quotas,
+                    }
+                )
+        return health
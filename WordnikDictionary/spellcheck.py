@@ -0,0 +1,280 @@
+from __future__ import annotations
+
+import contextlib
+import mmap
+import os
+import struct
+import zlib
+from array import array
+from bisect import bisect_left
+from logging import getLogger
+from typing import TYPE_CHECKING, Iterable, NamedTuple
+
+from .utils import acquire_lock, release_lock, replace_file
+from .wordstore import DEFAULT_INDEX_FOLDER, WordStore
+
+if TYPE_CHECKING:
+    from .utils import Deadline
+
+__all__ = ("SpellChecker", "Suggestion", "build_indexes")
+
+LOG = getLogger(__name__)
+
+INDEX_MAGIC = b"WNSC"
+INDEX_VERSION = 2
+MAX_DISTANCE = 2
+PREFIX_LENGTH = 7
+# how many candidates are checked between looking at the deadline
+DEADLINE_CHECK_INTERVAL = 64
+
+# magic, version, entry count, word list size, word list mtime
+HEADER = struct.Struct("=4sIQQQ")
+HEADER_SIZE = 32
+
+
+class Suggestion(NamedTuple):
+    word: str
+    distance: int
+    certainty: float
+
+
+def get_deletes(word: str, max_distance: int) -> set[str]:
+    deletes = {word}
+    edges = {word}
+    for _ in range(max_distance):
+        edges = {
+            edge[:idx] + edge[idx + 1 :] for edge in edges for idx in range(len(edge))
+        }
+        deletes |= edges
+    return deletes
+
+
+def get_key(delete: str) -> int:
+    return zlib.crc32(delete.encode())
+
+
+def get_distance(first: str, second: str, max_distance: int) -> int | None:
+    """
+    Returns the damerau-levenshtein (optimal string alignment) distance between two strings, or `None` if it's greater than `max_distance`.
+    """
+
+    if abs(len(first) - len(second)) > max_distance:
+        return None
+
+    previous_previous: list[int] = []
+    previous = list(range(len(second) + 1))
+    for i in range(1, len(first) + 1):
+        current = [i] + [0] * len(second)
+        for j in range(1, len(second) + 1):
+            cost = 0 if first[i - 1] == second[j - 1] else 1
+            current[j] = min(
+                previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost
+            )
+            if (
+                i > 1
+                and j > 1
+                and first[i - 1] == second[j - 2]
+                and first[i - 2] == second[j - 1]
+            ):
+                current[j] = min(current[j], previous_previous[j - 2] + 1)
+        if min(current) > max_distance:
+            return None
+        previous_previous, previous = previous, current
+
+    distance = previous[-1]
+    return distance if distance <= max_distance else None
+
+
+def get_max_distance(word: str) -> int:
+    # two edits is too loose for short words, and just buries the right answer
+    return 1 if len(word) <= 4 else MAX_DISTANCE
+
+
+class SpellChecker:
+    """
+    A SymSpell style spellcheck index, which is built once from a word list, and saved in the plugin's index folder.
+
+    Every deletion (up to `MAX_DISTANCE` characters) of each word's first `PREFIX_LENGTH` characters is hashed and stored with the word's id in the compiled `WordStore` in a sorted array, which is memory mapped and binary searched. So lookups only need to compute the edit distance for a handful of candidates instead of the entire list.
+    """
+
+    def __init__(self, words: WordStore) -> None:
+        self.words = words
+        self._mmap: mmap.mmap | None = None
+        self._entries: memoryview | None = None
+
+    @property
+    def index_loc(self) -> str:
+        return self.words.get_index_loc(".spellcheck")
+
+    def is_up_to_date(self) -> bool:
+        try:
+            stat = self.words.get_source_stat()
+            with open(self.words.get_index_loc(".spellcheck", stat), "rb") as f:
+                magic, version, _, size, mtime = HEADER.unpack(f.read(HEADER.size))
+        except (OSError, struct.error):
+            return False
+        return (
+            magic == INDEX_MAGIC
+            and version == INDEX_VERSION
+            and (size, mtime) == stat
+            and self.words.is_up_to_date()
+        )
+
+    def build(self) -> None:
+        LOG.info("Building spellcheck index for %r", self.words.word_list_loc)
+        if not self.words.is_up_to_date():
+            self.words.build()
+        self.words.load()
+        size, mtime = self.words.get_source_stat()
+        index_loc = self.words.get_index_loc(".spellcheck", (size, mtime))
+
+        # entries are bucketed by the top byte of their key, so that they can be sorted without holding millions of python ints at once
+        buckets = [array("Q") for _ in range(256)]
+        last_prefix = None
+        keys: list[int] = []
+        for word_id, word in enumerate(self.words):
+            prefix = word[:PREFIX_LENGTH]
+            if prefix != last_prefix:
+                keys = [get_key(d) for d in get_deletes(prefix, MAX_DISTANCE)]
+                last_prefix = prefix
+            for key in keys:
+                buckets[key >> 24].append((key << 32) | word_id)
+        entry_count = sum(len(bucket) for bucket in buckets)
+
+        temp_loc = f"{index_loc}.{os.getpid()}.tmp"
+        with open(temp_loc, "wb") as f:
+            f.write(
+                HEADER.pack(INDEX_MAGIC, INDEX_VERSION, entry_count, size, mtime).ljust(
+                    HEADER_SIZE, b"\0"
+                )
+            )
+            for bucket in buckets:
+                array("Q", sorted(bucket)).tofile(f)
+
+        # the index is built in a temp file and swapped in, so other processes never see a half built index
+        try:
+            replace_file(temp_loc, index_loc)
+        except OSError:
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(temp_loc)
+            raise
+        LOG.info("Finished building spellcheck index with %d entries", entry_count)
+
+    def load(self) -> None:
+        if not self.is_up_to_date():
+            self.build()
+
+        with open(self.index_loc, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        _, _, entry_count, _, _ = HEADER.unpack_from(self._mmap)
+        self._entries = memoryview(self._mmap)[
+            HEADER_SIZE : HEADER_SIZE + entry_count * 8
+        ].cast("Q")
+
+    def close(self) -> None:
+        """
+        Unmaps the index, which windows requires before the file can be replaced.
+        """
+
+        if self._entries is not None:
+            self._entries.release()
+        if self._mmap is not None:
+            self._mmap.close()
+        self._mmap = self._entries = None
+
+    @property
+    def entries(self) -> memoryview:
+        if self._entries is None:
+            self.load()
+        assert self._entries is not None
+        return self._entries
+
+    def _iter_candidate_ids(self, key: int) -> Iterable[int]:
+        entries = self.entries
+        idx = bisect_left(entries, key << 32)
+        while idx < len(entries) and entries[idx] >> 32 == key:
+            yield entries[idx] & 0xFFFFFFFF
+            idx += 1
+
+    def lookup(
+        self, word: str, *, limit: int = 10, deadline: Deadline | None = None
+    ) -> list[Suggestion]:
+        """
+        Returns up to `limit` words closest to `word`. If `deadline` expires first, the best of the candidates checked so far are returned.
+        """
+
+        word = word.lower()
+        if not word:
+            return []
+        max_distance = get_max_distance(word)
+
+        # deletes with the fewest characters removed are searched first, since the closest matches come from them
+        candidate_ids: dict[int, None] = {}
+        for delete in sorted(
+            get_deletes(word[:PREFIX_LENGTH], max_distance), key=len, reverse=True
+        ):
+            candidate_ids.update(
+                dict.fromkeys(self._iter_candidate_ids(get_key(delete)))
+            )
+            if deadline is not None and deadline.expired:
+                break
+
+        matches: list[tuple[int, str]] = []
+        for idx, word_id in enumerate(candidate_ids):
+            # the first batch is always checked, so that there's something to suggest
+            if (
+                deadline is not None
+                and idx
+                and idx % DEADLINE_CHECK_INTERVAL == 0
+                and deadline.expired
+            ):
+                LOG.debug(
+                    "Spellcheck ran out of time after %d of %d candidates",
+                    idx,
+                    len(candidate_ids),
+                )
+                break
+            candidate = self.words[word_id]
+            distance = get_distance(word, candidate, max_distance)
+            if distance is not None:
+                matches.append((distance, candidate))
+        if not matches:
+            return []
+
+        # certainty is only used to break ties, so it's only calculated for the matches that could make the cut
+        matches.sort()
+        from difflib import SequenceMatcher
+
+        cutoff = matches[min(limit, len(matches)) - 1][0]
+        suggestions = [
+            Suggestion(
+                candidate,
+                distance,
+                SequenceMatcher(None, word, candidate).ratio() * 100,
+            )
+            for distance, candidate in matches
+            if distance <= cutoff
+        ]
+        suggestions.sort(key=lambda s: (s.distance, -s.certainty, s.word))
+        return suggestions[:limit]
+
+
+def build_indexes(word_list_loc: str, index_folder: str = DEFAULT_INDEX_FOLDER) -> bool:
+    """
+    Builds the compiled word store and spellcheck index of a word list if they're out of date. Only one process builds them at a time, so this returns `False` straight away if another one already is.
+    """
+
+    words = WordStore(word_list_loc, index_folder)
+    checker = SpellChecker(words)
+    os.makedirs(index_folder, exist_ok=True)
+    if not acquire_lock(words.build_lock_loc):
+        LOG.info("Word list %r is already being indexed", word_list_loc)
+        return False
+    try:
+        if not checker.is_up_to_date():
+            checker.build()
+            words.remove_old_indexes()
+    finally:
+        words.close()
+        release_lock(words.build_lock_loc)
+    return True
@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+import sqlite3
+import threading
+import time
+from logging import getLogger
+
+from .utils import open_db, transaction
+
+__all__ = ("UsageLog",)
+
+LOG = getLogger(__name__)
+
+DEFAULT_USAGE_LOC = "WordnikDictionary/usage.sqlite3"
+DEFAULT_MAX_ENTRIES = 1000
+
+# a lookup counts for half as much after this many seconds, so that words you stopped looking up fall out of the log
+HALF_LIFE = 7 * 24 * 60 * 60
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS usage (
+    word TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    score REAL NOT NULL,
+    updated REAL NOT NULL,
+    PRIMARY KEY (word, kind)
+);
+"""
+
+
+def decay(score: float, updated: float, now: float) -> float:
+    return score * 0.5 ** ((now - updated) / HALF_LIFE)
+
+
+class UsageLog:
+    """
+    A log of how often each word is looked up, and with which modifier, shared between plugin processes through a SQLite database.
+
+    Each lookup adds 1 to a score that halves every `HALF_LIFE` seconds, and once the log holds more than `max_entries` lookups, the lowest scoring ones are dropped.
+    """
+
+    def __init__(
+        self, loc: str = DEFAULT_USAGE_LOC, *, max_entries: int = DEFAULT_MAX_ENTRIES
+    ) -> None:
+        self.loc = loc
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn: sqlite3.Connection | None = None
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = open_db(self.loc, SCHEMA)
+        return self._conn
+
+    def record(self, word: str, kind: str) -> None:
+        now = time.time()
+        word = word.lower()
+        try:
+            with self._lock:
+                with transaction(self.conn):
+                    row = self.conn.execute(
+                        "SELECT score, updated FROM usage WHERE word = ? AND kind = ?",
+                        (word, kind),
+                    ).fetchone()
+                    score = 1 + (decay(*row, now) if row else 0)
+                    self.conn.execute(
+                        "INSERT OR REPLACE INTO usage (word, kind, score, updated) VALUES (?, ?, ?, ?)",
+                        (word, kind, score, now),
+                    )
+                    if row is None:
+                        self._prune(now)
+        except sqlite3.Error as e:
+            LOG.warning("Unable to write to usage log", exc_info=e)
+
+    def _prune(self, now: float) -> None:
+        (count,) = self.conn.execute("SELECT COUNT(*) FROM usage").fetchone()
+        # prune in batches, so that a full log isn't sorted on every new word
+        if count <= self.max_entries * 1.1:
+            return
+
+        rows = self.conn.execute(
+            "SELECT word, kind, score, updated FROM usage"
+        ).fetchall()
+        rows.sort(key=lambda row: decay(row[2], row[3], now))
+        self.conn.executemany(
+            "DELETE FROM usage WHERE word = ? AND kind = ?",
+            [(word, kind) for word, kind, _, _ in rows[: count - self.max_entries]],
+        )
+        LOG.debug("Pruned %d entries from the usage log", count - self.max_entries)
+
+    def top(self, limit: int) -> list[tuple[str, str, float]]:
+        """
+        Returns the `limit` most used lookups, as `(word, kind, score)`, highest score first.
+        """
+
+        now = time.time()
+        try:
+            with self._lock:
+                rows = self.conn.execute(
+                    "SELECT word, kind, score, updated FROM usage"
+                ).fetchall()
+        except sqlite3.Error as e:
+            LOG.warning("Unable to read from usage log", exc_info=e)
+            return []
+        ranked = [
+            (word, kind, decay(score, updated, now))
+            for word, kind, score, updated in rows
+        ]
+        ranked.sort(key=lambda row: row[2], reverse=True)
+        return ranked[:limit]
@@ -1,22 +1,323 @@
+import atexit
+import contextlib
+import json
 import logging
 import logging.handlers
+import math
+import os
+import queue
+import sqlite3
+import sys
+import time
+from typing import Any, Iterable, Iterator
 
 LOG = logging.getLogger(__name__)
-__all__ = ("setup_logging",)
+__all__ = (
+    "setup_logging",
+    "apply_logging_settings",
+    "Truncated",
+    "SerializedList",
+    "dump_response",
+    "Deadline",
+    "pid_exists",
+    "acquire_lock",
+    "release_lock",
+    "is_locked",
+    "replace_file",
+    "spawn_detached",
+    "open_db",
+    "transaction",
+)
 
+LOG_LEVELS = ("DEBUG", "INFO", "WARNING", "ERROR")
+DEFAULT_LOG_LEVEL = "INFO"
+DEFAULT_PAYLOAD_LIMIT = 1000
+# how long a lock file can go without the pid of its owner before it's treated as abandoned
+LOCK_PID_GRACE = 30
 
-def setup_logging() -> None:
-    level = logging.DEBUG
+
+def setup_logging(level: str = DEFAULT_LOG_LEVEL) -> None:
+    """
+    Sends log records through a queue to a background thread, which formats and writes them to the log file, so that logging doesn't block handling the request. The queue is drained when the process exits.
+    """
+
+    # without a backup count the file is never rolled over, so keep one
     handler = logging.handlers.RotatingFileHandler(
-        "wordnik.logs", maxBytes=1000000, encoding="UTF-8"
+        "wordnik.logs", maxBytes=1000000, backupCount=1, encoding="UTF-8", delay=True
     )
 
     dt_fmt = "%Y-%m-%d %H:%M:%S"
     formatter = logging.Formatter(
         "[{asctime}] [{levelname:<8}] {name}: {message}", dt_fmt, style="{"
     )
+    handler.setFormatter(formatter)
+
+    log_queue: queue.SimpleQueue[logging.LogRecord] = queue.SimpleQueue()
+    listener = logging.handlers.QueueListener(log_queue, handler)
+    listener.start()
+    atexit.register(listener.stop)
 
     logger = logging.getLogger()
-    handler.setFormatter(formatter)
     logger.setLevel(level)
-    logger.addHandler(handler)
+    logger.addHandler(logging.handlers.QueueHandler(log_queue))
+
+
+def apply_logging_settings(settings: dict[str, Any]) -> None:
+    level = str(settings.get("log_level") or DEFAULT_LOG_LEVEL).upper()
+    if level not in LOG_LEVELS:
+        level = DEFAULT_LOG_LEVEL
+    logging.getLogger().setLevel(level)
+
+
+def get_payload_limit(settings: dict[str, Any]) -> int:
+    try:
+        return max(int(settings["log_payload_limit"]), 0)
+    except (KeyError, ValueError):
+        return DEFAULT_PAYLOAD_LIMIT
+
+
+class Truncated:
+    """
+    Wraps a payload that's being logged, so that it's only serialized if the record is actually emitted, and cut down to `limit` characters.
+    """
+
+    __slots__ = ("data", "limit")
+
+    def __init__(self, data: Any, limit: int = DEFAULT_PAYLOAD_LIMIT) -> None:
+        self.data = data
+        self.limit = limit
+
+    def __str__(self) -> str:
+        if self.limit <= 0:
+            return "<omitted>"
+        text = (
+            self.data
+            if isinstance(self.data, str)
+            else json.dumps(self.data, default=repr)
+        )
+        if len(text) > self.limit:
+            return f"{text[: self.limit]}... ({len(text)} characters)"
+        return text
+
+
+class SerializedList(list):
+    """
+    A list of results that keeps the JSON each one serializes to, which is measured to fit them in the payload budget, and then reused by `dump_response` instead of serializing them again.
+    """
+
+    __slots__ = ("pieces",)
+
+    def __init__(self, items: Iterable[Any] = ()) -> None:
+        super().__init__()
+        self.pieces: list[str] = []
+        for item in items:
+            self.append_serialized(item)
+
+    def append_serialized(self, item: Any, piece: str | None = None) -> int:
+        """
+        Adds an item along with its JSON, which is serialized here if it isn't given. Returns the size of the JSON.
+        """
+
+        if piece is None:
+            piece = json.dumps(item)
+        self.append(item)
+        self.pieces.append(piece)
+        return len(piece)
+
+
+def dump_response(response: dict[str, Any]) -> str:
+    """
+    Serializes a JSON-RPC response, reusing the JSON of its results if they're a `SerializedList`.
+    """
+
+    results = response.get("result")
+    if not isinstance(results, SerializedList) or len(results.pieces) != len(results):
+        return json.dumps(response)
+    payload = '{"result": [' + ", ".join(results.pieces) + "]"
+    rest = {key: value for key, value in response.items() if key != "result"}
+    if rest:
+        payload += ", " + json.dumps(rest)[1:-1]
+    return payload + "}"
+
+
+class Deadline:
+    """
+    The time left to handle a query in. Each stage checks it, so that it can cut its work short instead of holding up the results. A deadline created without a number of seconds never expires.
+    """
+
+    __slots__ = ("expires",)
+
+    def __init__(self, seconds: float | None = None) -> None:
+        self.expires = math.inf if seconds is None else time.monotonic() + seconds
+
+    def remaining(self) -> float:
+        return max(self.expires - time.monotonic(), 0)
+
+    @property
+    def expired(self) -> bool:
+        return time.monotonic() >= self.expires
+
+
+def pid_exists(pid: int) -> bool:
+    if pid <= 0:
+        return False
+    if os.name == "nt":
+        # os.kill terminates the process on windows, so ask for a handle to it instead
+        import ctypes
+
+        kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+        handle = kernel32.OpenProcess(0x1000, False, pid)
+        if not handle:
+            # access denied means it exists, but belongs to someone else
+            return ctypes.get_last_error() == 5
+        try:
+            code = ctypes.c_ulong()
+            if not kernel32.GetExitCodeProcess(handle, ctypes.byref(code)):
+                return True
+            return code.value == 259
+        finally:
+            kernel32.CloseHandle(handle)
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def is_locked(lock_loc: str) -> bool:
+    """
+    Returns `True` if the lock file exists, and the process that created it is still running.
+    """
+
+    try:
+        with open(lock_loc, "r") as f:
+            content = f.read()
+        if not content:
+            # the owner hasn't written its pid yet
+            return time.time() - os.path.getmtime(lock_loc) < LOCK_PID_GRACE
+    except FileNotFoundError:
+        return False
+    try:
+        return pid_exists(int(content))
+    except ValueError:
+        return False
+
+
+def acquire_lock(lock_loc: str) -> bool:
+    """
+    Creates a lock file holding this process' pid, taking over locks whose process is gone. Returns `False` if another running process holds it.
+    """
+
+    for _ in range(2):
+        try:
+            fd = os.open(lock_loc, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            if is_locked(lock_loc):
+                return False
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(lock_loc)
+        else:
+            with os.fdopen(fd, "w") as f:
+                f.write(str(os.getpid()))
+            return True
+    return False
+
+
+def release_lock(lock_loc: str) -> None:
+    with contextlib.suppress(FileNotFoundError):
+        os.remove(lock_loc)
+
+
+def replace_file(src: str, dst: str, *, attempts: int = 10, delay: float = 0.1) -> None:
+    """
+    `os.replace`, retried for a bit, since windows doesn't allow replacing a file while another process has it open or memory mapped.
+    """
+
+    for attempt in range(attempts):
+        try:
+            os.replace(src, dst)
+            return
+        except PermissionError:
+            if attempt == attempts - 1:
+                raise
+            time.sleep(delay)
+
+
+def spawn_detached(args: list[str], stdin: str | None = None) -> bool:
+    """
+    Starts `main.py` with the given arguments in a detached process, which keeps running after this one exits. Returns `False` if it couldn't be started.
+
+    `stdin` is written to the process' stdin. Anything secret, like api keys, has to be passed this way, since the arguments can be seen by anyone who lists the running processes.
+    """
+
+    import subprocess
+
+    kwargs: dict[str, Any] = {}
+    if sys.platform == "win32":
+        kwargs["creationflags"] = (
+            subprocess.DETACHED_PROCESS | subprocess.CREATE_NEW_PROCESS_GROUP
+        )
+    else:
+        kwargs["start_new_session"] = True
+    try:
+        process = subprocess.Popen(
+            [sys.executable, "main.py", *args],
+            stdin=subprocess.DEVNULL if stdin is None else subprocess.PIPE,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            close_fds=True,
+            **kwargs,
+        )
+        if process.stdin is not None:
+            with process.stdin:
+                process.stdin.write(stdin.encode())
+    except OSError as e:
+        LOG.warning("Unable to start background process %r", args[:1], exc_info=e)
+        return False
+    return True
+
+
+def open_db(
+    loc: str,
+    schema: str,
+    *,
+    version: int | None = None,
+    drop: str = "",
+    isolation_level: str | None = None,
+) -> sqlite3.Connection:
+    """
+    Opens one of the plugin's SQLite databases, which are shared by every plugin process, and creates its tables. Connections are in autocommit mode unless `isolation_level` is given.
+
+    If `version` is given and the database was created with a different one, `drop` is run first to throw out the tables whose layout changed.
+    """
+
+    conn = sqlite3.connect(
+        loc, timeout=5, isolation_level=isolation_level, check_same_thread=False
+    )
+    # WAL lets processes read while another one writes, and NORMAL only syncs at checkpoints, which is safe with WAL
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    if version is not None:
+        (current,) = conn.execute("PRAGMA user_version").fetchone()
+        if current != version:
+            conn.executescript(drop)
+            conn.execute(f"PRAGMA user_version = {version}")
+    conn.executescript(schema)
+    return conn
+
+
+@contextlib.contextmanager
+def transaction(conn: sqlite3.Connection) -> Iterator[sqlite3.Connection]:
+    """
+    Runs the block in a write transaction. The write lock is taken up front, so that two processes can't both read a row and then both update it.
+    """
+
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield conn
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
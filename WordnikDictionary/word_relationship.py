@@ -35,16 +35,20 @@ class WordRelationship(Dataclass):
             ),
         ]
 
+    @staticmethod
+    def get_word_context_menu_options(word: str) -> list[Option]:
+        return [
+            Option(title=f"Chosen Word: {word}"),
+            Option(title=f"Go back and click on the word to see definitions."),
+        ]
+
     def get_word_options(self) -> list[Option]:
         return [
             Option(
                 title=word,
                 callback="change_query",
                 params=[word],
-                context_data=[
-                    Option(title=f"Chosen Word: {word}"),
-                    Option(title=f"Go back and click on the word to see definitions."),
-                ],
+                context_key=["related_word", word],
             )
             for word in self.words
         ]
@@ -0,0 +1,197 @@
+from __future__ import annotations
+
+import contextlib
+import glob
+import hashlib
+import heapq
+import mmap
+import operator
+import os
+import struct
+from array import array
+from bisect import bisect_left
+from logging import getLogger
+from typing import Iterator
+
+from .utils import replace_file
+
+__all__ = ("WordStore",)
+
+LOG = getLogger(__name__)
+
+DEFAULT_INDEX_FOLDER = "WordnikDictionary/indexes"
+
+STORE_MAGIC = b"WNWL"
+STORE_VERSION = 1
+
+# magic, version, word count, word list size, word list mtime
+HEADER = struct.Struct("=4sIIQQ")
+HEADER_SIZE = 32
+
+
+class WordStore:
+    """
+    A compiled, read-only version of a word list file.
+
+    Words are lowercased, deduplicated and sorted, then saved in the plugin's index folder along with a table of their offsets. The compiled file is memory mapped, so checking if a word is in the list is a binary search that only touches a few pages, instead of reading the entire list into memory.
+    """
+
+    def __init__(
+        self, word_list_loc: str, index_folder: str = DEFAULT_INDEX_FOLDER
+    ) -> None:
+        self.word_list_loc = word_list_loc
+        self.index_folder = index_folder
+        self.path_key = hashlib.sha1(
+            os.path.abspath(word_list_loc).encode()
+        ).hexdigest()[:16]
+        # held while the store and spellcheck index are built, so that only one process builds them
+        self.build_lock_loc = os.path.join(index_folder, f"{self.path_key}.lock")
+        self._mmap: mmap.mmap | None = None
+        self._offsets: memoryview | None = None
+        self._words: memoryview | None = None
+
+    def get_source_stat(self) -> tuple[int, int]:
+        stat = os.stat(self.word_list_loc)
+        return stat.st_size, stat.st_mtime_ns
+
+    def get_index_loc(self, extension: str, stat: tuple[int, int] | None = None) -> str:
+        """
+        Returns where an artifact built from the word list is saved. It's named after the word list's path, size and mtime, so that word lists never share artifacts, and a changed list never reads the ones built from its old contents.
+        """
+
+        size, mtime = stat or self.get_source_stat()
+        key = hashlib.sha1(
+            f"{os.path.abspath(self.word_list_loc)}:{size}:{mtime}".encode()
+        ).hexdigest()[:16]
+        return os.path.join(self.index_folder, f"{self.path_key}-{key}{extension}")
+
+    @property
+    def store_loc(self) -> str:
+        return self.get_index_loc(".words")
+
+    def is_up_to_date(self) -> bool:
+        try:
+            stat = self.get_source_stat()
+            with open(self.get_index_loc(".words", stat), "rb") as f:
+                magic, version, _, size, mtime = HEADER.unpack(f.read(HEADER.size))
+        except (OSError, struct.error):
+            return False
+        return (
+            magic == STORE_MAGIC and version == STORE_VERSION and (size, mtime) == stat
+        )
+
+    def remove_old_indexes(self) -> None:
+        """
+        Deletes the artifacts built from previous versions of the word list.
+        """
+
+        current = self.get_index_loc("")
+        for loc in glob.glob(os.path.join(self.index_folder, f"{self.path_key}-*")):
+            if not loc.startswith(current):
+                # another process may still have it open, in which case it's left for the next rebuild
+                with contextlib.suppress(OSError):
+                    os.remove(loc)
+
+    def build(self) -> None:
+        LOG.info("Compiling word list %r", self.word_list_loc)
+        size, mtime = self.get_source_stat()
+        store_loc = self.get_index_loc(".words", (size, mtime))
+        with open(self.word_list_loc, "r") as f:
+            words = sorted({word for line in f if (word := line.strip().lower())})
+
+        offsets = array("I", [0])
+        blob = bytearray()
+        for word in words:
+            blob += word.encode()
+            offsets.append(len(blob))
+
+        os.makedirs(self.index_folder, exist_ok=True)
+        temp_loc = f"{store_loc}.{os.getpid()}.tmp"
+        with open(temp_loc, "wb") as f:
+            f.write(
+                HEADER.pack(STORE_MAGIC, STORE_VERSION, len(words), size, mtime).ljust(
+                    HEADER_SIZE, b"\0"
+                )
+            )
+            offsets.tofile(f)
+            f.write(blob)
+
+        # the store is built in a temp file and swapped in, so other processes never see a half written store
+        try:
+            replace_file(temp_loc, store_loc)
+        except OSError:
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(temp_loc)
+            raise
+        LOG.info("Finished compiling word list with %d words", len(words))
+
+    def load(self) -> None:
+        if not self.is_up_to_date():
+            self.build()
+
+        with open(self.store_loc, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        _, _, word_count, _, _ = HEADER.unpack_from(self._mmap)
+
+        view = memoryview(self._mmap)
+        words_start = HEADER_SIZE + (word_count + 1) * 4
+        self._offsets = view[HEADER_SIZE:words_start].cast("I")
+        self._words = view[words_start:]
+
+    def close(self) -> None:
+        """
+        Unmaps the store, which windows requires before the file can be replaced.
+        """
+
+        for view in (self._offsets, self._words):
+            if view is not None:
+                view.release()
+        if self._mmap is not None:
+            self._mmap.close()
+        self._mmap = self._offsets = self._words = None
+
+    @property
+    def offsets(self) -> memoryview:
+        if self._offsets is None:
+            self.load()
+        assert self._offsets is not None
+        return self._offsets
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, idx: int) -> str:
+        offsets = self.offsets
+        assert self._words is not None
+        return bytes(self._words[offsets[idx] : offsets[idx + 1]]).decode()
+
+    def __iter__(self) -> Iterator[str]:
+        for idx in range(len(self)):
+            yield self[idx]
+
+    def complete(self, prefix: str, *, limit: int = 10) -> list[str]:
+        """
+        Returns words that start with the given prefix, shortest first. Since the words are sorted, every word with the prefix is in one contiguous run, which is found with a binary search.
+        """
+
+        prefix = prefix.lower()
+        if not prefix:
+            return []
+
+        start = bisect_left(self, prefix)
+        # the first string after every word with the prefix
+        end = bisect_left(self, prefix[:-1] + chr(ord(prefix[-1]) + 1), start)
+        offsets = self.offsets
+        # lengths come straight from the offsets table, so only the shortest words are decoded, however long the run is
+        lengths = map(operator.sub, offsets[start + 1 : end + 1], offsets[start:end])
+        shortest = heapq.nsmallest(limit + 1, zip(lengths, range(start, end)))
+        found = [word for _, idx in shortest if (word := self[idx]) != prefix]
+        found.sort(key=lambda word: (len(word), word))
+        return found[:limit]
+
+    def __contains__(self, word: object) -> bool:
+        if not isinstance(word, str):
+            return False
+        word = word.lower()
+        idx = bisect_left(self, word)
+        return idx < len(self) and self[idx] == word
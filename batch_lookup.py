@@ -0,0 +1,80 @@
+"""
+Looks up every word in a word list, and writes the results to a JSONL file, one line per word.
+
+Usage:
+    python batch_lookup.py words.txt results.jsonl
+    type words.txt | python batch_lookup.py - results.jsonl
+
+If the output file already exists, words that already have results in it are skipped, so an interrupted run can be picked back up by running the same command again. Words that ran into errors are looked up again, and their new results are appended.
+"""
+
+import argparse
+import os
+import sys
+
+parent_folder_path = os.path.abspath(os.path.dirname(__file__))
+sys.path.append(parent_folder_path)
+sys.path.append(os.path.join(parent_folder_path, "lib"))
+
+from WordnikDictionary.batch import BatchLookup, iter_done_words, iter_words
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Looks up a list of words on wordnik, and streams the results as JSONL."
+    )
+    parser.add_argument("input", help="a file with one word per line, or - for stdin")
+    parser.add_argument("output", help="the JSONL file to write the results to")
+    parser.add_argument(
+        "--api-key",
+        default=os.environ.get("WORDNIK_API_KEY", ""),
+        help="your wordnik api key, defaults to the WORDNIK_API_KEY environment variable",
+    )
+    parser.add_argument(
+        "--workers", type=int, default=4, help="how many words to look up at once"
+    )
+    parser.add_argument(
+        "--results",
+        type=int,
+        default=20,
+        help="the max number of definitions and related words to fetch per word",
+    )
+    parser.add_argument(
+        "--cache",
+        action="store_true",
+        help="read from and write to the plugin's response cache",
+    )
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    output_loc = os.path.abspath(args.output)
+    input_loc = args.input if args.input == "-" else os.path.abspath(args.input)
+    os.chdir(parent_folder_path)
+
+    skip: set[str] = set()
+    if os.path.exists(output_loc):
+        with open(output_loc, "r", encoding="UTF-8") as f:
+            skip.update(iter_done_words(f))
+        with open(output_loc, "rb+") as f:
+            # don't append to a half written line from an interrupted run
+            if f.seek(0, os.SEEK_END):
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    f.write(b"\n")
+
+    batch = BatchLookup(
+        {
+            "api_key": args.api_key,
+            "results": str(args.results),
+            "cache_enabled": args.cache,
+        },
+        workers=max(args.workers, 1),
+    )
+    input_file = (
+        sys.stdin if input_loc == "-" else open(input_loc, "r", encoding="UTF-8")
+    )
+    with input_file, open(output_loc, "a", encoding="UTF-8") as output:
+        count = batch.run(iter_words(input_file), output, skip=skip)
+    print(f"Looked up {count} words, skipped {len(skip)} that already had results.")
@@ -0,0 +1,133 @@
+"""
+Measures the cold start of the default one-process-per-query mode, using `python -X importtime` to break down where the import time goes. The plugin runs in a temporary folder, so the benchmark doesn't touch your logs, metrics or caches.
+
+Usage: python benchmarks/cold_start.py [number of runs per query]
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from stub_server import StubServer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MAIN = os.path.join(ROOT, "main.py")
+SETTINGS = {
+    "api_key": "benchmark",
+    "results": "20",
+    "spellcheck_autocomplete": False,
+    "prefix_completion": False,
+    # the cache is turned off so that every lookup hits the stub server
+    "cache_enabled": False,
+    # and usage isn't recorded, so the benchmark words don't end up in your usage log
+    "usage_history": False,
+    "metrics": False,
+}
+QUERIES = {
+    "empty query": "",
+    "modifier menu": "happy!select-modifier",
+    "lookup": "happy",
+}
+
+
+def parse_importtime(stderr: str) -> tuple[int, dict[str, int]]:
+    """
+    Returns the total import time, and the cumulative import time of each module the plugin's own modules import, in microseconds.
+
+    Modules the plugin imports lazily, while handling the query, are listed at the top level rather than under the plugin module that imported them, so every top-level import after the plugin's own first one is counted as the plugin's too.
+    """
+
+    lines = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        # nested imports are indented by two extra spaces per level
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        lines.append((depth, int(cumulative), name.strip()))
+
+    plugin_start = next(
+        (
+            idx
+            for idx, (depth, _, name) in enumerate(lines)
+            if depth == 0 and name.startswith("WordnikDictionary")
+        ),
+        len(lines),
+    )
+
+    total = 0
+    imported_by_plugin = {}
+    # children are listed before their parent, so walk backwards to know each module's parent
+    stack: list[tuple[int, str]] = []
+    for idx in reversed(range(len(lines))):
+        depth, cumulative, name = lines[idx]
+        while stack and stack[-1][0] >= depth:
+            stack.pop()
+        parent = stack[-1][1] if stack else None
+        stack.append((depth, name))
+        if parent is None:
+            total += cumulative
+        if name.startswith("WordnikDictionary"):
+            continue
+        if parent is None:
+            imported = idx > plugin_start
+        else:
+            imported = parent.startswith("WordnikDictionary")
+        if imported:
+            imported_by_plugin[name] = imported_by_plugin.get(name, 0) + cumulative
+    return total, imported_by_plugin
+
+
+def run_query(
+    query: str, env: dict[str, str], folder: str
+) -> tuple[float, tuple[int, dict[str, int]]]:
+    request = {"method": "query", "parameters": [query], "settings": SETTINGS}
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", MAIN, json.dumps(request)],
+        cwd=folder,
+        env=env,
+        check=True,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+    elapsed = time.perf_counter() - start
+    return elapsed, parse_importtime(proc.stderr)
+
+
+def main() -> None:
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    with tempfile.TemporaryDirectory() as folder, StubServer() as server:
+        # the plugin keeps its state in paths relative to the working directory, under `WordnikDictionary/`
+        os.makedirs(os.path.join(folder, "WordnikDictionary"))
+        env = {**os.environ, "WORDNIK_API_URL": server.url}
+        for name, query in QUERIES.items():
+            wall_times = []
+            import_times = []
+            modules: dict[str, list[int]] = {}
+            for _ in range(runs):
+                elapsed, (total, imports) = run_query(query, env, folder)
+                wall_times.append(elapsed * 1000)
+                import_times.append(total / 1000)
+                for module, cumulative in imports.items():
+                    modules.setdefault(module, []).append(cumulative)
+
+            print(
+                f"{name!r:<16} wall p50={statistics.median(wall_times):7.2f}ms imports p50={statistics.median(import_times):7.2f}ms"
+            )
+            heaviest = sorted(
+                modules.items(), key=lambda item: statistics.median(item[1])
+            )[-6:]
+            for module, times in reversed(heaviest):
+                print(f"    {module:<32} {statistics.median(times) / 1000:7.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,254 @@
+"""
+End to end latency benchmark. Runs `WordnikDictionaryPlugin` queries against a local stub of the wordnik api, so it needs no network access or api key.
+
+Every query is run with a fresh, empty cache, in a temporary folder, so that your real response cache and rate limit state are left alone. Reports p50/p95/p99 latency and peak memory for each scenario, then simulates bursts of typing, where flow launcher starts a new query for every keystroke while the previous ones are still running.
+
+Usage: python benchmarks/latency.py [--runs N] [--latency SECONDS] [--interval SECONDS] [--word-list PATH]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import statistics
+import string
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from typing import Any
+
+from stub_server import FIXTURES_LOC, StubServer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+SETTINGS = {
+    "api_key": "benchmark",
+    "results": "20",
+    "spellcheck_autocomplete": True,
+    "prefix_completion": False,
+    "cache_enabled": False,
+}
+
+# name -> (query, settings overrides)
+SCENARIOS: dict[str, tuple[str, dict[str, Any]]] = {
+    "definitions": ("happy", {}),
+    "part of speech": ("happy!adjective", {}),
+    "syllables": ("developer!syllables", {}),
+    "similiar": ("vague!similiar", {}),
+    "scrabble": ("aspect!scrabble", {}),
+    "rel-synonym": ("happy!rel-synonym", {}),
+    "overview": ("effect!overview", {}),
+    "spellcheck miss": ("hapy", {}),
+    "not found (404)": ("zzyzx", {"spellcheck_autocomplete": False}),
+    "invalid key (401)": ("happy", {"api_key": "invalid"}),
+    "cache hit": ("affect", {"cache_enabled": True}),
+}
+
+BURST_WORDS = ["happy", "developer", "aspect", "hapy"]
+
+
+def percentile(values: list[float], pct: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def get_peak_rss() -> float | None:
+    try:
+        import resource
+    except ImportError:
+        return None
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # linux reports kilobytes, macos reports bytes
+    return peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024
+
+
+def make_word_list(loc: str, size: int = 20000) -> None:
+    """
+    Writes a word list of the fixture words, their related words, and random filler words, so that the spellcheck path has a realistic index to search.
+    """
+
+    with open(FIXTURES_LOC, "r") as f:
+        fixtures = json.load(f)
+    words = set(fixtures)
+    for data in fixtures.values():
+        for relationship in data.get("relatedWords", []):
+            words.update(word for word in relationship["words"] if word.isalpha())
+
+    rng = random.Random(0)
+    while len(words) < size:
+        length = rng.randint(3, 12)
+        words.add("".join(rng.choices(string.ascii_lowercase, k=length)))
+
+    with open(loc, "w") as f:
+        f.write("\n".join(sorted(words)))
+
+
+class Harness:
+    def __init__(self, folder: str, word_list_loc: str) -> None:
+        from WordnikDictionary.core import WordnikDictionaryPlugin
+        from WordnikDictionary.spellcheck import build_indexes
+
+        # indexed up front, like a downloaded word list is, since queries only index it in the background
+        self.index_folder = os.path.join(folder, "indexes")
+        build_indexes(word_list_loc, self.index_folder)
+        self.plugin_cls = WordnikDictionaryPlugin
+        self.folder = folder
+        self.word_list_loc = word_list_loc
+        self._counter = 0
+        self._lock = threading.Lock()
+
+    def make_plugin(self, shared: str | None = None):
+        """
+        Creates a plugin that keeps its cache, rate limit and circuit breaker state, usage log, and word list indexes in a temporary folder. Plugins created with the same `shared` name share that state, like plugin processes do.
+        """
+
+        from WordnikDictionary.cache import ResponseCache
+        from WordnikDictionary.circuit import CircuitBreaker
+        from WordnikDictionary.coalesce import RequestCoalescer
+        from WordnikDictionary.ratelimit import RateLimiter
+        from WordnikDictionary.usage import UsageLog
+
+        if shared is None:
+            with self._lock:
+                self._counter += 1
+                shared = f"run-{self._counter}"
+        folder = os.path.join(self.folder, shared)
+        os.makedirs(folder, exist_ok=True)
+
+        plugin = self.plugin_cls()
+        plugin.http._cache = ResponseCache(os.path.join(folder, "cache.sqlite3"))
+        plugin.http.coalescer = RequestCoalescer(os.path.join(folder, "inflight"))
+        plugin.http.ratelimiter = RateLimiter(os.path.join(folder, "ratelimit.sqlite3"))
+        plugin.http.circuit = CircuitBreaker(os.path.join(folder, "ratelimit.sqlite3"))
+        plugin.usage = UsageLog(os.path.join(folder, "usage.sqlite3"))
+        plugin.index_folder = self.index_folder
+        return plugin
+
+    def query(self, plugin, query: str, overrides: dict[str, Any]) -> list[dict]:
+        settings = {**SETTINGS, "wordlist_loc": self.word_list_loc, **overrides}
+        response = plugin.handle_request(
+            {"method": "query", "parameters": [query], "settings": settings}
+        )
+        assert response is not None
+        return response["result"]
+
+
+def time_scenario(
+    harness: Harness, query: str, overrides: dict[str, Any], runs: int
+) -> tuple[list[float], int]:
+    def run_once() -> float:
+        plugin = harness.make_plugin()
+        if overrides.get("cache_enabled"):
+            # warm the cache, so that only the cached lookup is timed
+            harness.query(plugin, query, overrides)
+        start = time.perf_counter()
+        harness.query(plugin, query, overrides)
+        return time.perf_counter() - start
+
+    run_once()
+    timings = [run_once() * 1000 for _ in range(runs)]
+
+    tracemalloc.start()
+    run_once()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return timings, peak
+
+
+def run_burst(
+    harness: Harness, word: str, interval: float
+) -> tuple[list[float], float]:
+    """
+    Types out a word, starting a new query for each keystroke while the earlier ones may still be running. Returns the latency of each keystroke, and of the final one.
+    """
+
+    shared = f"burst-{word}-{time.monotonic_ns()}"
+    timings: list[float] = [0] * len(word)
+
+    def keystroke(idx: int) -> None:
+        plugin = harness.make_plugin(shared)
+        start = time.perf_counter()
+        harness.query(plugin, word[: idx + 1], {"cache_enabled": True})
+        timings[idx] = (time.perf_counter() - start) * 1000
+
+    threads = []
+    for idx in range(len(word)):
+        thread = threading.Thread(target=keystroke, args=(idx,))
+        thread.start()
+        threads.append(thread)
+        time.sleep(interval)
+    for thread in threads:
+        thread.join()
+    return timings, timings[-1]
+
+
+def report(name: str, timings: list[float], extra: str = "") -> None:
+    line = f"{name:<20} n={len(timings):<4} p50={statistics.median(timings):8.2f}ms p95={percentile(timings, 95):8.2f}ms p99={percentile(timings, 99):8.2f}ms {extra}"
+    print(line.rstrip())
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=50, help="runs per scenario")
+    parser.add_argument(
+        "--latency",
+        type=float,
+        default=0.02,
+        help="seconds the stub server waits before each response",
+    )
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=0.05,
+        help="seconds between keystrokes in the typing bursts",
+    )
+    parser.add_argument(
+        "--word-list",
+        help="the word list to spellcheck against, defaults to a generated one",
+    )
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    with tempfile.TemporaryDirectory() as folder, StubServer(
+        latency=args.latency
+    ) as server:
+        # the api url is read when the plugin is imported, so the stub has to be running first
+        os.environ["WORDNIK_API_URL"] = server.url
+        word_list_loc = args.word_list or os.path.join(folder, "word_list.txt")
+        if not args.word_list:
+            make_word_list(word_list_loc)
+        harness = Harness(folder, os.path.abspath(word_list_loc))
+
+        print(f"stub latency={args.latency * 1000:.0f}ms runs={args.runs}")
+        for name, (query, overrides) in SCENARIOS.items():
+            timings, peak = time_scenario(harness, query, overrides, args.runs)
+            report(name, timings, f"peak={peak / 1024:8.1f}KiB")
+
+        print(f"\ntyping bursts, one keystroke every {args.interval * 1000:.0f}ms")
+        keystrokes: list[float] = []
+        finals: list[float] = []
+        start_count = server.request_count
+        for _ in range(max(args.runs // 10, 1)):
+            for word in BURST_WORDS:
+                timings, final = run_burst(harness, word, args.interval)
+                keystrokes.extend(timings)
+                finals.append(final)
+        report("keystroke", keystrokes)
+        report("final keystroke", finals)
+        print(f"requests sent to stub: {server.request_count - start_count}")
+
+    rss = get_peak_rss()
+    if rss is not None:
+        print(f"\npeak rss: {rss:.1f}MiB")
+
+
+if __name__ == "__main__":
+    main()
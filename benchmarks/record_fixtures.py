@@ -0,0 +1,58 @@
+"""
+Records real wordnik api responses into `fixtures.json`, which the stub server replays. Needs network access and an api key.
+
+Usage: python benchmarks/record_fixtures.py API_KEY word [word ...]
+
+Words that wordnik doesn't know aren't recorded, so the stub server responds to them with a 404, just like the real api.
+"""
+
+from __future__ import annotations
+
+import json
+import sys
+
+import requests
+from stub_server import FIXTURES_LOC
+
+API_URL = "https://api.wordnik.com/v4"
+
+# endpoint -> the params the plugin sends to it
+ENDPOINTS = {
+    "definitions": {"limit": 20, "includeRelated": False, "includeTags": False},
+    "hyphenation": {"limit": 50},
+    # recorded with a high limit, so the stub can replay smaller limits and single relationship types
+    "relatedWords": {"limitPerRelationshipType": 100},
+    "scrabbleScore": {},
+}
+
+
+def record(api_key: str, words: list[str]) -> None:
+    with open(FIXTURES_LOC, "r") as f:
+        fixtures: dict[str, dict] = json.load(f)
+
+    session = requests.Session()
+    for word in words:
+        recorded = {}
+        for endpoint, params in ENDPOINTS.items():
+            res = session.get(
+                f"{API_URL}/word.json/{word}/{endpoint}",
+                params={**params, "api_key": api_key},
+                timeout=10,
+            )
+            if res.status_code == 404:
+                continue
+            res.raise_for_status()
+            recorded[endpoint] = res.json()
+        if recorded:
+            fixtures[word.lower()] = recorded
+        print(f"{word}: recorded {', '.join(recorded) or 'nothing'}")
+
+    with open(FIXTURES_LOC, "w") as f:
+        json.dump(fixtures, f, indent=2)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        print(__doc__.strip())
+        sys.exit(1)
+    record(sys.argv[1], sys.argv[2:])
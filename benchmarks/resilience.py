@@ -0,0 +1,127 @@
+"""
+Benchmarks how the plugin holds up when the wordnik api doesn't, against a local stub that can be made slow, flaky or unavailable.
+
+- tail latency: a share of responses take much longer than the rest, with and without hedged requests
+- flaky api: a share of responses are 503s, which are retried
+- outage: every response is a 503, after the cache was filled and has expired, so stale responses are served and the circuit breaker opens
+- deadline: every response takes 2s, with a 500ms query deadline, for single words and overviews
+
+Usage: python benchmarks/resilience.py [--runs N]
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+
+from latency import Harness, make_word_list, report
+from stub_server import StubServer
+
+WORDS = ["happy", "developer", "aspect", "vague", "effect"]
+
+
+def time_queries(
+    harness: Harness, overrides: dict, runs: int, shared: str | None = None
+) -> tuple[list[float], list[list[dict]]]:
+    timings = []
+    results = []
+    for idx in range(runs):
+        plugin = harness.make_plugin(shared)
+        start = time.perf_counter()
+        results.append(harness.query(plugin, WORDS[idx % len(WORDS)], overrides))
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings, results
+
+
+def count_errors(results: list[list[dict]]) -> int:
+    return sum(
+        1 for result in results if any("Wordnik" in opt["Title"] for opt in result)
+    )
+
+
+def count_stale(results: list[list[dict]]) -> int:
+    return sum(
+        1
+        for result in results
+        if result and all(opt["SubTitle"].startswith("(stale)") for opt in result)
+    )
+
+
+def count_partial(results: list[list[dict]]) -> int:
+    return sum(
+        1 for result in results if result and result[-1]["Title"] == "Partial results"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=100, help="queries per scenario")
+    args = parser.parse_args()
+    # the failures are expected, so keep their warnings out of the report
+    logging.getLogger().addHandler(logging.NullHandler())
+
+    with tempfile.TemporaryDirectory() as folder, StubServer(latency=0.02) as server:
+        # the api url is read when the plugin is imported, so the stub has to be running first
+        os.environ["WORDNIK_API_URL"] = server.url
+        word_list_loc = os.path.join(folder, "word_list.txt")
+        make_word_list(word_list_loc)
+        harness = Harness(folder, word_list_loc)
+        harness.query(harness.make_plugin(), "happy", {})
+
+        print("tail latency, 5% of responses take 1s")
+        server.tail_rate, server.tail_latency = 0.05, 1
+        for name, hedge_after in (("no hedging", "0"), ("hedge after 100ms", "100")):
+            start_count = server.request_count
+            timings, _ = time_queries(harness, {"hedge_after": hedge_after}, args.runs)
+            report(name, timings, f"requests={server.request_count - start_count}")
+        server.tail_rate = 0
+
+        print("\nflaky api, 20% of responses are 503s")
+        server.error_rate = 0.2
+        timings, results = time_queries(harness, {}, args.runs)
+        report("flaky", timings, f"errors={count_errors(results)}/{args.runs}")
+        server.error_rate = 0
+
+        print("\noutage, every response is a 503 and the cache has expired")
+        shared = f"outage-{time.monotonic_ns()}"
+        time_queries(harness, {"cache_enabled": True}, len(WORDS), shared)
+        cache = harness.make_plugin(shared).http.cache
+        cache.conn.execute("UPDATE responses SET expires = created")
+        server.down = True
+        start_count = server.request_count
+        timings, results = time_queries(
+            harness, {"cache_enabled": True}, args.runs, shared
+        )
+        report(
+            "outage",
+            timings,
+            f"stale={count_stale(results)}/{args.runs} requests={server.request_count - start_count}",
+        )
+        server.down = False
+
+        print("\ndeadline, every response takes 2s and queries get 500ms")
+        server.latency = 2
+        runs = max(args.runs // 10, 1)
+        for name, suffix in (("single word", ""), ("overview", "!overview")):
+            timings = []
+            results = []
+            for idx in range(runs):
+                plugin = harness.make_plugin()
+                start = time.perf_counter()
+                results.append(
+                    harness.query(
+                        plugin,
+                        WORDS[idx % len(WORDS)] + suffix,
+                        {"query_deadline": "500"},
+                    )
+                )
+                timings.append((time.perf_counter() - start) * 1000)
+            report(name, timings, f"partial={count_partial(results)}/{runs}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,108 @@
+"""
+Compares query latency between the default one-process-per-query mode, and the persistent `--server` mode.
+
+The plugin runs in a temporary folder, so that your real cache, rate limit state, usage log and metrics are left alone.
+
+Usage: python benchmarks/server_mode.py [number of queries]
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from stub_server import StubServer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MAIN = os.path.join(ROOT, "main.py")
+QUERIES = ["happy", "vague", "developer", "happy!syllables", "vague!similiar"]
+SETTINGS = {
+    "api_key": "benchmark",
+    "results": "20",
+    "spellcheck_autocomplete": False,
+    # the cache is turned off so that both modes hit the stub server every time
+    "cache_enabled": False,
+    # and nothing is recorded, since it's only benchmark lookups
+    "usage_history": False,
+    "metrics": False,
+}
+
+
+def make_request(idx: int) -> dict:
+    return {
+        "id": idx,
+        "method": "query",
+        "parameters": [QUERIES[idx % len(QUERIES)]],
+        "settings": SETTINGS,
+    }
+
+
+def bench_argv_mode(count: int, env: dict[str, str], folder: str) -> list[float]:
+    timings = []
+    for idx in range(count):
+        start = time.perf_counter()
+        subprocess.run(
+            [sys.executable, MAIN, json.dumps(make_request(idx))],
+            cwd=folder,
+            env=env,
+            check=True,
+            stdout=subprocess.DEVNULL,
+        )
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def bench_server_mode(count: int, env: dict[str, str], folder: str) -> list[float]:
+    timings = []
+    proc = subprocess.Popen(
+        [sys.executable, MAIN, "--server"],
+        cwd=folder,
+        env=env,
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        text=True,
+    )
+    assert proc.stdin and proc.stdout
+    try:
+        for idx in range(count):
+            start = time.perf_counter()
+            proc.stdin.write(json.dumps(make_request(idx)) + "\n")
+            proc.stdin.flush()
+            proc.stdout.readline()
+            timings.append(time.perf_counter() - start)
+    finally:
+        proc.stdin.close()
+        proc.wait()
+    return timings
+
+
+def report(name: str, timings: list[float]) -> None:
+    ms = sorted(t * 1000 for t in timings)
+    p95 = ms[min(len(ms) - 1, int(len(ms) * 0.95))]
+    print(
+        f"{name:<8} n={len(ms):<4} mean={statistics.mean(ms):8.2f}ms p50={statistics.median(ms):8.2f}ms p95={p95:8.2f}ms"
+    )
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    with tempfile.TemporaryDirectory() as folder, StubServer() as server:
+        # the plugin keeps its state in paths relative to the working directory, under `WordnikDictionary/`
+        os.makedirs(os.path.join(folder, "WordnikDictionary"))
+        env = {**os.environ, "WORDNIK_API_URL": server.url}
+        argv_timings = bench_argv_mode(count, env, folder)
+        server_timings = bench_server_mode(count, env, folder)
+
+    report("argv", argv_timings)
+    report("server", server_timings)
+    speedup = statistics.median(argv_timings) / statistics.median(server_timings)
+    print(f"server mode p50 speedup: {speedup:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""
+A local stand-in for the wordnik api, used by the benchmarks so that they can run without network access.
+
+Responses are served from `fixtures.json`, which maps words to the body of each endpoint. Unknown words get a 404, and the api key `invalid` gets a 401, just like the real api. When `quota` is set, responses carry wordnik's `X-RateLimit-*` headers for a per-minute quota, and requests over it get a 429.
+
+To simulate an unreliable api, `error_rate` is the share of requests answered with a 503, `down` makes every request get a 503, and `tail_rate` is the share of requests that take `tail_latency` seconds instead of `latency`.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+from urllib.parse import parse_qs, unquote_plus, urlparse
+
+__all__ = ("StubServer",)
+
+FIXTURES_LOC = os.path.join(os.path.dirname(__file__), "fixtures.json")
+
+
+class StubRequestHandler(BaseHTTPRequestHandler):
+    server: StubServer
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+    def send_json(self, status: int, data, remaining: int | None = None) -> None:
+        body = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        if remaining is not None:
+            self.send_header("X-RateLimit-Limit-Minute", str(self.server.quota))
+            self.send_header("X-RateLimit-Remaining-Minute", str(remaining))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self) -> None:
+        self.server.request_count += 1
+        if self.server.tail_rate and random.random() < self.server.tail_rate:
+            time.sleep(self.server.tail_latency)
+        elif self.server.latency:
+            time.sleep(self.server.latency)
+        if self.server.down or (
+            self.server.error_rate and random.random() < self.server.error_rate
+        ):
+            return self.send_json(503, {"message": "Service Unavailable"})
+
+        url = urlparse(self.path)
+        params = parse_qs(url.query)
+        api_key = params.get("api_key", [""])[0]
+        if api_key == "invalid":
+            return self.send_json(401, {"message": "unauthorized", "type": "error"})
+
+        remaining = self.server.use_quota(api_key)
+        if remaining is not None and remaining < 0:
+            self.server.rejected_count += 1
+            return self.send_json(
+                429, {"message": "API rate limit exceeded"}, remaining=0
+            )
+
+        # /v4/word.json/{word}/{endpoint}
+        parts = url.path.strip("/").split("/")
+        if len(parts) != 4 or parts[:2] != ["v4", "word.json"]:
+            return self.send_json(404, {"message": "Not Found"})
+        word, endpoint = unquote_plus(parts[2]), parts[3]
+
+        try:
+            data = self.server.fixtures[word.lower()][endpoint]
+        except KeyError:
+            return self.send_json(
+                404,
+                {"statusCode": 404, "error": "Not Found", "message": "Not found"},
+                remaining=remaining,
+            )
+        if endpoint == "relatedWords":
+            data = filter_related_words(data, params)
+        self.send_json(200, data, remaining=remaining)
+
+
+def filter_related_words(
+    data: list[dict[str, Any]], params: dict[str, list[str]]
+) -> list[dict[str, Any]]:
+    limit = int(params.get("limitPerRelationshipType", ["10"])[0])
+    types = params.get("relationshipTypes", [""])[0].split(",")
+    return [
+        {**item, "words": item["words"][:limit]}
+        for item in data
+        if not any(types) or item["relationshipType"] in types
+    ]
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(
+        self,
+        *,
+        latency: float = 0,
+        quota: int | None = None,
+        fixtures_loc: str = FIXTURES_LOC,
+        error_rate: float = 0,
+        tail_rate: float = 0,
+        tail_latency: float = 0,
+    ):
+        super().__init__(("127.0.0.1", 0), StubRequestHandler)
+        self.latency = latency
+        self.error_rate = error_rate
+        self.down = False
+        self.tail_rate = tail_rate
+        self.tail_latency = tail_latency
+        self.quota = quota
+        self.request_count = 0
+        self.rejected_count = 0
+        self._quota_lock = threading.Lock()
+        self._quota_window = 0
+        self._quota_used: dict[str, int] = {}
+        with open(fixtures_loc, "r") as f:
+            self.fixtures: dict[str, dict] = json.load(f)
+
+    def use_quota(self, api_key: str) -> int | None:
+        """
+        Like wordnik, the quota is per api key.
+        """
+
+        if self.quota is None:
+            return None
+        with self._quota_lock:
+            window = int(time.time() // 60)
+            if window != self._quota_window:
+                self._quota_window = window
+                self._quota_used = {}
+            self._quota_used[api_key] = self._quota_used.get(api_key, 0) + 1
+            return self.quota - self._quota_used[api_key]
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v4"
+
+    def __enter__(self) -> StubServer:
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.shutdown()
+        self.server_close()
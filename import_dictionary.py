@@ -0,0 +1,26 @@
+"""
+Imports an open dictionary dump into the offline dictionary.
+
+Usage:
+    python import_dictionary.py wordnet path/to/wordnet/dict
+    python import_dictionary.py wiktionary path/to/kaikki-dump.jsonl
+"""
+
+import os
+import sys
+
+parent_folder_path = os.path.abspath(os.path.dirname(__file__))
+sys.path.append(parent_folder_path)
+sys.path.append(os.path.join(parent_folder_path, "lib"))
+
+from WordnikDictionary.offline import IMPORTERS, OfflineDictionary
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3 or sys.argv[1] not in IMPORTERS:
+        print(__doc__.strip())
+        sys.exit(1)
+
+    dump_loc = os.path.abspath(sys.argv[2])
+    os.chdir(parent_folder_path)
+    count = OfflineDictionary().import_dump(sys.argv[1], dump_loc)
+    print(f"Imported {count} definitions.")
@@ -1,3 +1,8 @@
+import time
+
+# taken before anything else is imported, so that the startup phase includes import time
+STARTED = time.perf_counter()
+
 import os
 import sys
 
@@ -7,8 +12,19 @@ sys.path.append(os.path.join(parent_folder_path, "lib"))
 sys.path.append(os.path.join(parent_folder_path, "plugin"))
 
 from WordnikDictionary.core import WordnikDictionaryPlugin
+from WordnikDictionary.prefetch import run_prefetch_worker
+from WordnikDictionary.spellcheck import build_indexes
 from WordnikDictionary.utils import setup_logging
 
 if __name__ == "__main__":
     setup_logging()
-    WordnikDictionaryPlugin()
+    if sys.argv[1:2] == ["--server"]:
+        WordnikDictionaryPlugin().serve()
+    elif sys.argv[1:2] == ["--prefetch"]:
+        run_prefetch_worker(sys.argv[2], sys.stdin.read())
+    elif sys.argv[1:2] == ["--build-index"]:
+        build_indexes(sys.argv[2], sys.argv[3])
+    else:
+        plugin = WordnikDictionaryPlugin()
+        plugin.metrics.record("startup", time.perf_counter() - STARTED)
+        plugin.run()